@@ -0,0 +1,1437 @@
+#!/usr/bin/env python3
+
+"""
+bench_ward_reco_runtime.py
+
+Offline benchmarks for the ward recommendation pipeline.
+
+Each case prints one line per measured variant and returns a JSON-friendly
+dict; --json-out keeps the raw numbers for later comparison.
+
+Cases:
+  runtime-layout  schema v5 objects vs schema v6 columnar runtime: file size,
+                  json.loads time and the loader-equivalent validation time.
+  declutter       runtime greedy spacing/region selection for every precomputed
+                  list vs slicing the embedded ranked spot indices.
+  spatial-index   radius queries through the embedded grid vs a brute-force scan;
+                  fails if any query returns a different spot set.
+  counter-sentry  live counter-sentry lookups through the embedded table vs scanning
+                  every own sentry; fails if the best sentry agrees less often
+                  than COUNTER_SENTRY_MIN_AGREEMENT or the mean signal lost
+                  exceeds COUNTER_SENTRY_MAX_SIGNAL_LOSS.
+  region-pyramid  region quota selection over the embedded region pyramid vs the
+                  full greedy pass for every level, quota and group; fails if
+                  any answered selection differs.
+  output-validation
+                  the builder's validation stage (compiled schema, invariants,
+                  columnar payload digest and rows checksum) per layout, against
+                  jsonschema when installed (pip install jsonschema); plus the
+                  loader's per-spot checks.
+  json-writer     json.dumps of the whole runtime vs the streaming writer on each
+                  available backend; fails if any backend's bytes differ.
+  left-time-matcher
+                  ward lifetimes for synthetic 90-minute matches through the
+                  batched left-log sweep vs the former bisect-and-delete
+                  matcher, for typical ward counts and for heavy sentry spam
+                  on a few shared spots; fails if any player's lifetimes differ.
+  match-decode    json.loads of synthetic OpenDota match responses vs the
+                  builder's selective decoder: time and peak allocation per
+                  match; fails if extraction differs.
+
+Pipeline stages, over --stage-matches fixed-seed matches from
+generate_ward_reco_synthetic.py (hotspots from --dataset):
+  daily-load      load_match_cache_from_daily_files over five daily batches.
+  extract         extract_match_samples per decoded match, left-log matching
+                  included (left-time-matcher isolates the matcher itself).
+  cluster         cluster_placements: SpatialGroupIndex insertion of every
+                  placement.
+  spot-payload    SpotAccumulator.aggregate and build_spot_payload per spot.
+  counter-sentry-scores
+                  apply_counter_sentry_scores over every group's payloads.
+  runtime-write   write_json of the full runtime payload and of one daily
+                  batch file.
+  contact-sheet   render_ward_reco_map's contact sheet (needs Pillow).
+  quality-diff    diff_ward_reco_runtime over --dataset against a jittered,
+                  rescored copy of itself; fails if a self-diff is not exact.
+
+--compare BASELINE compares the run (or --results FILE) against a file
+written by --json-out and exits 1 when a median time or peak allocation grew
+by more than --threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import functools
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import build_ward_reco_runtime as builder
+import diff_ward_reco_runtime as quality
+import generate_ward_reco_synthetic as synthetic
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_DATASET = HERE / "scripts_files" / "data" / "ward_reco_dataset.runtime.json"
+BENCH_RESULTS_SCHEMA_VERSION = 1
+STAGE_SEED = 47
+STAGE_DAYS = 5
+# Error bound of the approximate counter-sentry table (top-3 per tile, ranked at
+# the tile centre): the repo runtime measures 0.93 agreement, 1.6% signal lost.
+COUNTER_SENTRY_MIN_AGREEMENT = 0.9
+COUNTER_SENTRY_MAX_SIGNAL_LOSS = 0.025
+# left-time-matcher's sentry-spam case: one match per this many --matches,
+# each support placing this many sentries over this many shared spots.
+LEFT_TIME_SPAM_MATCH_DIVISOR = 40
+LEFT_TIME_SPAM_SENTRIES = 3000
+LEFT_TIME_SPAM_SPOTS = 4
+# Leaf keys --compare checks; lower is better for all of them.
+REGRESSION_METRIC_PREFIXES = ("median_ms", "peak_kib")
+
+
+def time_call(action: Callable[[], Any], repeats: int) -> dict[str, float]:
+    samples: list[float] = []
+    for _ in range(max(1, repeats)):
+        started_at = time.perf_counter()
+        action()
+        samples.append(time.perf_counter() - started_at)
+    return {
+        "min_ms": round(min(samples) * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3)
+    }
+
+
+def time_prepared(
+    prepare: Callable[[], Any],
+    action: Callable[[Any], Any],
+    repeats: int
+) -> dict[str, float]:
+    """time_call for actions that consume their input; prepare runs untimed."""
+    samples: list[float] = []
+    for _ in range(max(1, repeats)):
+        prepared = prepare()
+        started_at = time.perf_counter()
+        action(prepared)
+        samples.append(time.perf_counter() - started_at)
+    return {
+        "min_ms": round(min(samples) * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3)
+    }
+
+
+def _finite(value: Any) -> bool:
+    return isinstance(value, (int, float)) and math.isfinite(value)
+
+
+def validate_objects_like_loader(payload: dict[str, Any]) -> int:
+    """Per-spot checks equivalent to WardDataLoader's schema v5 path."""
+    valid = 0
+    seen: set[str] = set()
+    for spot in payload.get("spots", []):
+        if not isinstance(spot, dict):
+            continue
+        spot_id = spot.get("spot_id")
+        if not isinstance(spot_id, str) or not spot_id:
+            continue
+        if spot.get("type") not in ("Observer", "Sentry"):
+            continue
+        world = spot.get("world_avg") if isinstance(spot.get("world_avg"), dict) else {}
+        stats = spot.get("stats") if isinstance(spot.get("stats"), dict) else {}
+        cell = spot.get("cell") if isinstance(spot.get("cell"), dict) else {}
+        if not _finite(world.get("x")) or not _finite(world.get("y")):
+            continue
+        key = f"{spot['type']}:{spot_id}"
+        if key in seen:
+            continue
+        seen.add(key)
+        _finite(cell.get("x"))
+        _finite(cell.get("y"))
+        _finite(stats.get("score"))
+        valid += 1
+    return valid
+
+
+def validate_columnar_like_loader(payload: dict[str, Any]) -> int:
+    """Per-column checks plus row decode, equivalent to the schema v6 path."""
+    columns = payload["columns"]
+    length = len(columns["type"])
+    for name in (
+        "team",
+        "time_bucket",
+        "cell_x",
+        "cell_y",
+        "world_x",
+        "world_y",
+        "score",
+        "observer_risky_quick_deward"
+    ):
+        column = columns.get(name)
+        if not isinstance(column, list) or len(column) != length:
+            return 0
+    type_names = payload["dictionaries"]["type"]
+    world_scale = payload["scales"]["world"]
+    world_x = columns["world_x"]
+    world_y = columns["world_y"]
+    valid = 0
+    for row, type_code in enumerate(columns["type"]):
+        if type_names[type_code] not in ("Observer", "Sentry"):
+            continue
+        if not _finite(world_x[row] / world_scale) or not _finite(world_y[row] / world_scale):
+            continue
+        valid += 1
+    return valid
+
+
+def bench_runtime_layout(args: argparse.Namespace) -> dict[str, Any]:
+    payload = json.loads(Path(args.dataset).read_text(encoding="utf-8"))
+    if payload.get("layout") == "columnar":
+        payload = builder.decode_runtime_columnar(payload)
+    variants = {
+        "v5_objects": payload,
+        "v6_columnar": builder.encode_runtime_columnar(payload)
+    }
+    validators = {
+        "v5_objects": validate_objects_like_loader,
+        "v6_columnar": validate_columnar_like_loader
+    }
+    out: dict[str, Any] = {}
+    for name, variant in variants.items():
+        text = json.dumps(variant, ensure_ascii=False, separators=(",", ":")) + "\n"
+        parsed = json.loads(text)
+        validator = validators[name]
+        out[name] = {
+            "bytes": len(text.encode("utf-8")),
+            "spots": validator(parsed),
+            "parse": time_call(lambda: json.loads(text), args.repeats),
+            "validate": time_call(lambda: validator(parsed), args.repeats)
+        }
+    for name, row in out.items():
+        print(
+            f"  {name:12} bytes={row['bytes']:>8} spots={row['spots']:>5} "
+            f"parse_median_ms={row['parse']['median_ms']:>8.3f} "
+            f"validate_median_ms={row['validate']['median_ms']:>8.3f}"
+        )
+    return out
+
+
+def bench_declutter(args: argparse.Namespace) -> dict[str, Any]:
+    payload = json.loads(Path(args.dataset).read_text(encoding="utf-8"))
+    if payload.get("layout") == "columnar":
+        payload = builder.decode_runtime_columnar(payload)
+    spots = payload["spots"]
+    selections = payload.get("selections") or builder.build_spot_selections(spots)
+    top_n = min(10, selections["max_top_n"])
+    pools: list[tuple[dict[str, Any], list[dict[str, Any]]]] = []
+    for entry in selections["lists"]:
+        pool = [
+            spot
+            for spot in spots
+            if spot["team"] == entry["team"]
+            and spot["time_bucket"] == entry["time_bucket"]
+            and spot["type"] == entry["type"]
+            and not (
+                entry.get("exclude_risky_observer")
+                and spot["flags"]["observer_risky_quick_deward"]
+            )
+        ]
+        pools.append((entry, pool))
+
+    def run_greedy() -> None:
+        for entry, pool in pools:
+            builder.rank_decluttered_spots(
+                pool,
+                min_cell_distance=entry["min_cell_distance"],
+                min_minimap_distance=entry["min_minimap_distance"],
+                region_quota=entry["region_quota"],
+                region_size=entry["region_size"],
+                limit=top_n
+            )
+
+    def run_slice() -> None:
+        for entry, _ in pools:
+            [spots[index] for index in entry["spot_indices"][:top_n]]
+
+    out = {
+        "lists": len(pools),
+        "top_n": top_n,
+        "greedy": time_call(run_greedy, args.repeats),
+        "precomputed": time_call(run_slice, args.repeats)
+    }
+    print(
+        f"  lists={out['lists']} top_n={top_n} "
+        f"greedy_median_ms={out['greedy']['median_ms']:.3f} "
+        f"precomputed_median_ms={out['precomputed']['median_ms']:.3f}"
+    )
+    return out
+
+
+def brute_force_radius(
+    spots: list[dict[str, Any]],
+    group: tuple[str, str, str],
+    world_x: float,
+    world_y: float,
+    radius_world: float
+) -> list[int]:
+    radius_sq = radius_world * radius_world
+    return [
+        index
+        for index, spot in enumerate(spots)
+        if (spot["team"], spot["time_bucket"], spot["type"]) == group
+        and (spot["world_avg"]["x"] - world_x) ** 2 + (spot["world_avg"]["y"] - world_y) ** 2
+        <= radius_sq
+    ]
+
+
+def bench_spatial_index(args: argparse.Namespace) -> dict[str, Any]:
+    payload = json.loads(Path(args.dataset).read_text(encoding="utf-8"))
+    if payload.get("layout") == "columnar":
+        payload = builder.decode_runtime_columnar(payload)
+    if "spatial_index" not in payload:
+        payload["spatial_index"] = builder.build_spatial_index(payload["spots"])
+    index = builder.RuntimeSpatialIndex(payload)
+    spots = index.spots
+    groups = sorted({(spot["team"], spot["time_bucket"], spot["type"]) for spot in spots})
+    rng = random.Random(1234)
+    queries: list[tuple[tuple[str, str, str], float, float, float]] = []
+    for _ in range(args.queries):
+        group = rng.choice(groups)
+        if rng.random() < 0.5:
+            # Centre on a real spot so most queries have hits, not just empty tiles.
+            anchor = rng.choice(spots)["world_avg"]
+            world_x, world_y = anchor["x"], anchor["y"]
+        else:
+            world_x = rng.uniform(-8500.0, 8500.0)
+            world_y = rng.uniform(-8500.0, 8500.0)
+        queries.append((group, world_x, world_y, rng.choice((260.0, 640.0, 1500.0))))
+
+    mismatches = 0
+    hits = 0
+    for group, world_x, world_y, radius in queries:
+        expected = brute_force_radius(spots, group, world_x, world_y, radius)
+        got = index.query_radius(*group, world_x, world_y, radius)
+        hits += len(expected)
+        if got != expected:
+            mismatches += 1
+
+    def run_index() -> None:
+        for group, world_x, world_y, radius in queries:
+            index.query_radius(*group, world_x, world_y, radius)
+
+    def run_brute_force() -> None:
+        for group, world_x, world_y, radius in queries:
+            brute_force_radius(spots, group, world_x, world_y, radius)
+
+    repeats = max(1, args.repeats // 4)
+    out = {
+        "queries": len(queries),
+        "hits": hits,
+        "mismatches": mismatches,
+        "index": time_call(run_index, repeats),
+        "brute_force": time_call(run_brute_force, repeats)
+    }
+    print(
+        f"  queries={out['queries']} hits={hits} mismatches={mismatches} "
+        f"index_median_ms={out['index']['median_ms']:.3f} "
+        f"brute_force_median_ms={out['brute_force']['median_ms']:.3f}"
+    )
+    if mismatches:
+        raise SystemExit(f"spatial-index: {mismatches} queries disagree with brute force")
+    return out
+
+
+def bench_counter_sentry(args: argparse.Namespace) -> dict[str, Any]:
+    payload = json.loads(Path(args.dataset).read_text(encoding="utf-8"))
+    if payload.get("layout") == "columnar":
+        payload = builder.decode_runtime_columnar(payload)
+    if "counter_sentry" not in payload:
+        payload["counter_sentry"] = builder.build_counter_sentry_table(payload["spots"])
+    table = builder.RuntimeCounterSentryTable(payload)
+    spots = table.spots
+    sentries: dict[tuple[str, str], list[int]] = defaultdict(list)
+    observers: dict[tuple[str, str], list[dict[str, Any]]] = defaultdict(list)
+    for index, spot in enumerate(spots):
+        key = (spot["team"], spot["time_bucket"])
+        if spot["type"] == "Sentry":
+            sentries[key].append(index)
+        else:
+            observers[key].append(spot)
+    enemy = {"radiant": "dire", "dire": "radiant"}
+    rng = random.Random(1234)
+    queries: list[tuple[str, str, float, float]] = []
+    groups = sorted(key for key in sentries if observers.get((enemy[key[0]], key[1])))
+    for _ in range(args.queries if groups else 0):
+        team, time_bucket = rng.choice(groups)
+        # Sightings scattered around the enemy's historical observer spots.
+        anchor = rng.choice(observers[(enemy[team], time_bucket)])["cell"]
+        queries.append(
+            (
+                team,
+                time_bucket,
+                anchor["x"] + rng.uniform(-3.0, 3.0),
+                anchor["y"] + rng.uniform(-3.0, 3.0)
+            )
+        )
+
+    def scan(team: str, time_bucket: str, cell_x: float, cell_y: float) -> float:
+        return max(
+            (table.signal(index, cell_x, cell_y) for index in sentries[(team, time_bucket)]),
+            default=0.0
+        )
+
+    covered = 0
+    agreed = 0
+    signal_loss = 0.0
+    for team, time_bucket, cell_x, cell_y in queries:
+        best = scan(team, time_bucket, cell_x, cell_y)
+        if best <= 0:
+            continue
+        covered += 1
+        found = table.lookup(team, time_bucket, cell_x, cell_y)
+        got = table.signal(found[0], cell_x, cell_y) if found else 0.0
+        agreed += got == best
+        signal_loss += (best - got) / best
+
+    def run_table() -> None:
+        for query in queries:
+            table.lookup(*query)
+
+    def run_scan() -> None:
+        for query in queries:
+            scan(*query)
+
+    repeats = max(1, args.repeats // 4)
+    out = {
+        "queries": len(queries),
+        "covered": covered,
+        "best_agreement": round(agreed / max(1, covered), 4),
+        "mean_signal_loss": round(signal_loss / max(1, covered), 4),
+        "table": time_call(run_table, repeats),
+        "scan": time_call(run_scan, repeats)
+    }
+    print(
+        f"  queries={out['queries']} covered={covered} "
+        f"best_agreement={out['best_agreement']:.4f} "
+        f"mean_signal_loss={out['mean_signal_loss']:.4f} "
+        f"table_median_ms={out['table']['median_ms']:.3f} "
+        f"scan_median_ms={out['scan']['median_ms']:.3f}"
+    )
+    if covered and (
+        out["best_agreement"] < COUNTER_SENTRY_MIN_AGREEMENT
+        or out["mean_signal_loss"] > COUNTER_SENTRY_MAX_SIGNAL_LOSS
+    ):
+        raise SystemExit(
+            f"counter-sentry: best_agreement={out['best_agreement']:.4f} "
+            f"(min {COUNTER_SENTRY_MIN_AGREEMENT}) mean_signal_loss="
+            f"{out['mean_signal_loss']:.4f} (max {COUNTER_SENTRY_MAX_SIGNAL_LOSS})"
+        )
+    return out
+
+
+def bench_region_pyramid(args: argparse.Namespace) -> dict[str, Any]:
+    payload = json.loads(Path(args.dataset).read_text(encoding="utf-8"))
+    if payload.get("layout") == "columnar":
+        payload = builder.decode_runtime_columnar(payload)
+    if "region_pyramid" not in payload:
+        payload["region_pyramid"] = builder.build_region_pyramid(payload["spots"])
+    pyramid = builder.RuntimeRegionPyramid(payload)
+    spots = pyramid.spots
+    pools: dict[tuple[str, str, str], list[int]] = defaultdict(list)
+    for index, spot in enumerate(spots):
+        pools[(spot["team"], spot["time_bucket"], spot["type"])].append(index)
+    # Client defaults, adaptive per-bucket spacing and no spacing at all.
+    spacings = [(1.5, 2.5), (0.0, 0.0)]
+    queries: list[tuple[tuple[str, str, str], float, float, int, float, bool]] = []
+    for group in sorted(pools):
+        for min_cell_distance, min_minimap_distance in [
+            *spacings,
+            builder.SELECTION_SPACING_BY_BUCKET[group[1]]
+        ]:
+            for region_size in payload["region_pyramid"]["region_sizes"]:
+                for region_quota in range(1, pyramid.top_k + 1):
+                    for exclude_risky in (False, True) if group[2] == "Observer" else (False,):
+                        queries.append(
+                            (
+                                group,
+                                min_cell_distance,
+                                min_minimap_distance,
+                                region_quota,
+                                float(region_size),
+                                exclude_risky
+                            )
+                        )
+    top_n = min(10, builder.SELECTION_MAX_TOP_N)
+
+    def greedy(query: tuple[tuple[str, str, str], float, float, int, float, bool]) -> list[int]:
+        group, min_cell_distance, min_minimap_distance, region_quota, region_size, risky = query
+        pool = [
+            index
+            for index in pools[group]
+            if not (risky and spots[index]["flags"]["observer_risky_quick_deward"])
+        ]
+        ranked = builder.rank_decluttered_spots(
+            [spots[index] for index in pool],
+            min_cell_distance=min_cell_distance,
+            min_minimap_distance=min_minimap_distance,
+            region_quota=region_quota,
+            region_size=region_size,
+            limit=top_n
+        )
+        return [pool[position] for position in ranked]
+
+    def walk(
+        query: tuple[tuple[str, str, str], float, float, int, float, bool]
+    ) -> list[int] | None:
+        group, min_cell_distance, min_minimap_distance, region_quota, region_size, risky = query
+        return pyramid.select(
+            *group,
+            min_cell_distance=min_cell_distance,
+            min_minimap_distance=min_minimap_distance,
+            region_quota=region_quota,
+            region_size=region_size,
+            top_n=top_n,
+            exclude_risky=risky
+        )
+
+    answered = 0
+    mismatches = 0
+    for query in queries:
+        got = walk(query)
+        if got is None:
+            continue
+        answered += 1
+        if got != greedy(query):
+            mismatches += 1
+
+    def run_pyramid() -> None:
+        for query in queries:
+            walk(query)
+
+    def run_greedy() -> None:
+        for query in queries:
+            greedy(query)
+
+    repeats = max(1, args.repeats // 4)
+    out = {
+        "queries": len(queries),
+        "top_n": top_n,
+        "answered": answered,
+        "mismatches": mismatches,
+        "pyramid": time_call(run_pyramid, repeats),
+        "greedy": time_call(run_greedy, repeats)
+    }
+    print(
+        f"  queries={out['queries']} top_n={top_n} answered={answered} "
+        f"mismatches={mismatches} pyramid_median_ms={out['pyramid']['median_ms']:.3f} "
+        f"greedy_median_ms={out['greedy']['median_ms']:.3f}"
+    )
+    if mismatches:
+        raise SystemExit(f"region-pyramid: {mismatches} selections disagree with the greedy pass")
+    return out
+
+
+def bench_output_validation(args: argparse.Namespace) -> dict[str, Any]:
+    payload = json.loads(Path(args.dataset).read_text(encoding="utf-8"))
+    if payload.get("layout") == "columnar":
+        payload = builder.decode_runtime_columnar(payload)
+    payload.pop("validated", None)
+    validator = builder.RuntimeValidator(builder.DEFAULT_RUNTIME_SCHEMA_PATH)
+    try:
+        import jsonschema
+    except ImportError:
+        jsonschema = None
+    generic = (
+        jsonschema.Draft202012Validator(json.loads(validator.schema_path.read_text("utf-8")))
+        if jsonschema is not None
+        else None
+    )
+    out: dict[str, Any] = {}
+    failures: list[str] = []
+    for name, variant in (
+        ("v5_objects", payload),
+        ("v6_columnar", builder.encode_runtime_columnar(payload))
+    ):
+        error = validator.error(variant)
+        if error is not None:
+            failures.append(f"{name}: {error}")
+        if generic is not None and not generic.is_valid(variant):
+            failures.append(f"{name}: jsonschema rejects it")
+        row: dict[str, Any] = {
+            "compiled_schema": time_call(lambda: validator.schema.error(variant), args.repeats),
+            "invariants": time_call(
+                lambda: builder.runtime_invariant_error(variant), args.repeats
+            )
+        }
+        # Only the columnar layout is written with a marker.
+        if variant.get("layout") == "columnar":
+            row["digest"] = time_call(
+                lambda: builder.runtime_payload_digest(variant, validator.schema_sha256),
+                args.repeats
+            )
+            row["rows_checksum"] = time_call(
+                lambda: builder.runtime_rows_checksum(variant), args.repeats
+            )
+        if generic is not None:
+            row["jsonschema"] = time_call(
+                lambda: generic.is_valid(variant), max(1, args.repeats // 4)
+            )
+        out[name] = row
+        print(
+            f"  {name:12} compiled_schema_median_ms={row['compiled_schema']['median_ms']:.3f} "
+            f"invariants_median_ms={row['invariants']['median_ms']:.3f}"
+            + (
+                f" digest_median_ms={row['digest']['median_ms']:.3f}"
+                f" rows_checksum_median_ms={row['rows_checksum']['median_ms']:.3f}"
+                if "rows_checksum" in row
+                else ""
+            )
+            + (
+                f" jsonschema_median_ms={row['jsonschema']['median_ms']:.3f}"
+                if generic is not None
+                else ""
+            )
+        )
+    out["loader"] = {
+        "checked": time_call(lambda: validate_objects_like_loader(payload), args.repeats)
+    }
+    print(f"  loader       checked_median_ms={out['loader']['checked']['median_ms']:.3f}")
+    if failures:
+        raise SystemExit("output-validation: " + "; ".join(failures))
+    return out
+
+
+def bench_json_writer(args: argparse.Namespace) -> dict[str, Any]:
+    payload = json.loads(Path(args.dataset).read_text(encoding="utf-8"))
+    expected = (json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n").encode(
+        "utf-8"
+    )
+    backends = ["stdlib"] + (["orjson"] if builder.orjson is not None else [])
+    previous_backend = builder.JSON_BACKEND
+    out: dict[str, Any] = {
+        "bytes": len(expected),
+        "json_dumps": time_call(
+            lambda: json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            args.repeats
+        )
+    }
+    mismatched: list[str] = []
+    try:
+        for backend in backends:
+            builder.set_json_backend(backend)
+            if builder.encode_json(payload) != expected:
+                mismatched.append(backend)
+            out[f"stream_{backend}"] = time_call(lambda: builder.encode_json(payload), args.repeats)
+    finally:
+        builder.set_json_backend(previous_backend)
+    print(f"  bytes={out['bytes']} json_dumps_median_ms={out['json_dumps']['median_ms']:.3f}")
+    for backend in backends:
+        print(f"  stream_{backend:7} median_ms={out[f'stream_{backend}']['median_ms']:.3f}")
+    if mismatched:
+        raise SystemExit(f"json-writer: output differs from json.dumps for {', '.join(mismatched)}")
+    return out
+
+
+def synthetic_match_players(
+    rng: random.Random,
+    duration_sec: float,
+    *,
+    support_sentries: int = 70,
+    spot_count: int = 40,
+    ehandle_rate: float = 0.8
+) -> list[dict[str, Any]]:
+    """Ten players' ward logs over one match. Wards sit on a few popular spots,
+    ehandles are recycled and sometimes missing, and some wards never leave or
+    outlive MAX_WARD_LIFETIME_BY_TYPE, so both match paths and misses occur.
+    support_sentries, spot_count and ehandle_rate scale up sentry spam on shared
+    spots that only the coordinate fallback can tell apart."""
+    spots = [(rng.randint(70, 190), rng.randint(70, 190)) for _ in range(spot_count)]
+    players: list[dict[str, Any]] = []
+    for slot in (0, 1, 2, 3, 4, 128, 129, 130, 131, 132):
+        player: dict[str, Any] = {"player_slot": slot}
+        support = slot % 128 >= 3
+        for ward_type, log_name, left_log_name, count in (
+            ("Observer", "obs_log", "obs_left_log", 45 if support else 6),
+            ("Sentry", "sen_log", "sen_left_log", support_sentries if support else 10)
+        ):
+            max_lifetime = builder.MAX_WARD_LIFETIME_BY_TYPE[ward_type]
+            placed: list[dict[str, Any]] = []
+            left: list[dict[str, Any]] = []
+            for _ in range(count):
+                place_time = float(rng.randint(-90, int(duration_sec)))
+                x, y = rng.choice(spots)
+                ehandle = rng.randint(1, 60)
+                event: dict[str, Any] = {"time": place_time, "x": x, "y": y}
+                if rng.random() < ehandle_rate:
+                    event["ehandle"] = ehandle
+                placed.append(event)
+                if rng.random() < 0.1:
+                    continue
+                left_event: dict[str, Any] = {
+                    "time": place_time + rng.uniform(0.0, max_lifetime * 1.1),
+                    "x": x + rng.choice((0, 0, 0, 1)),
+                    "y": y
+                }
+                if rng.random() < 0.9:
+                    left_event["ehandle"] = ehandle
+                left.append(left_event)
+            left.sort(key=lambda item: item["time"])
+            player[log_name] = placed
+            player[left_log_name] = left
+        players.append(player)
+    return players
+
+
+def legacy_left_time_lookup(
+    player: dict[str, Any],
+    log_name: str
+) -> tuple[dict[int, list[float]], dict[tuple[int, int], list[float]]]:
+    """The builder's lookup before the batched sweep: one sorted list of left
+    times per ehandle and per rounded coordinate."""
+    events = player.get(log_name)
+    by_ehandle: dict[int, list[float]] = defaultdict(list)
+    by_coords: dict[tuple[int, int], list[float]] = defaultdict(list)
+    if not isinstance(events, list):
+        return by_ehandle, by_coords
+
+    for event in events:
+        if not isinstance(event, dict):
+            continue
+        try:
+            event_time = float(event.get("time"))
+        except (TypeError, ValueError):
+            continue
+        x = event.get("x")
+        y = event.get("y")
+        if x is not None and y is not None:
+            try:
+                by_coords[(int(round(float(x))), int(round(float(y))))].append(event_time)
+            except (TypeError, ValueError):
+                pass
+        try:
+            ehandle = int(event.get("ehandle"))
+        except (TypeError, ValueError):
+            ehandle = None
+        if ehandle is not None:
+            by_ehandle[ehandle].append(event_time)
+
+    for values in by_ehandle.values():
+        values.sort()
+    for values in by_coords.values():
+        values.sort()
+    return by_ehandle, by_coords
+
+
+def legacy_consume_left_time(
+    event: dict[str, Any],
+    place_time: float,
+    ward_type: str,
+    by_ehandle: dict[int, list[float]],
+    by_coords: dict[tuple[int, int], list[float]]
+) -> float | None:
+    """Bisects and trims the lookup lists once per placement."""
+    max_lifetime = builder.MAX_WARD_LIFETIME_BY_TYPE.get(ward_type, 600.0)
+    try:
+        ehandle_key = int(event.get("ehandle"))
+    except (TypeError, ValueError):
+        ehandle_key = None
+    if ehandle_key is not None:
+        values = by_ehandle.get(ehandle_key)
+        if values:
+            index = bisect.bisect_left(values, place_time)
+            if index < len(values):
+                candidate = values[index]
+                delta = candidate - place_time
+                if 0 <= delta <= max_lifetime:
+                    del values[index]
+                    return delta
+
+    try:
+        coord_key = (
+            int(round(float(event.get("x")))),
+            int(round(float(event.get("y"))))
+        )
+    except (TypeError, ValueError):
+        return None
+    values = by_coords.get(coord_key)
+    if not values:
+        return None
+    index = bisect.bisect_left(values, place_time)
+    if index >= len(values):
+        return None
+    candidate = values[index]
+    delta = candidate - place_time
+    if 0 <= delta <= max_lifetime:
+        del values[index]
+        return delta
+    return None
+
+
+def legacy_player_lifetimes(player: dict[str, Any]) -> list[tuple[str, float, float | None]]:
+    """Per-placement lifetimes the way iter_player_place_samples matched them
+    before the batched sweep."""
+    placed_events = [
+        (float(event["time"]), ward_type, event)
+        for log_name, ward_type in (("obs_log", "Observer"), ("sen_log", "Sentry"))
+        for event in player[log_name]
+    ]
+    placed_events.sort(key=lambda item: item[0])
+    lookups = {
+        "Observer": legacy_left_time_lookup(player, "obs_left_log"),
+        "Sentry": legacy_left_time_lookup(player, "sen_left_log")
+    }
+    out: list[tuple[str, float, float | None]] = []
+    for place_time, ward_type, event in placed_events:
+        if builder.classify_time_bucket(place_time) is None:
+            continue
+        by_ehandle, by_coords = lookups[ward_type]
+        out.append(
+            (
+                ward_type,
+                place_time,
+                legacy_consume_left_time(event, place_time, ward_type, by_ehandle, by_coords)
+            )
+        )
+    return out
+
+
+def batched_player_lifetimes(player: dict[str, Any]) -> list[tuple[str, float, float | None]]:
+    """Per-placement lifetimes through the builder's match_left_times."""
+    placed_events = [
+        (float(event["time"]), ward_type, event)
+        for log_name, ward_type in (("obs_log", "Observer"), ("sen_log", "Sentry"))
+        for event in player[log_name]
+    ]
+    placed_events.sort(key=lambda item: item[0])
+    placed_events = [
+        item for item in placed_events if builder.classify_time_bucket(item[0]) is not None
+    ]
+    lifetimes = {
+        ward_type: iter(
+            builder.match_left_times(
+                [(place_time, event) for place_time, event_type, event in placed_events
+                 if event_type == ward_type],
+                player[log_name],
+                ward_type
+            )
+        )
+        for log_name, ward_type in (("obs_left_log", "Observer"), ("sen_left_log", "Sentry"))
+    }
+    return [
+        (ward_type, place_time, next(lifetimes[ward_type]))
+        for place_time, ward_type, _ in placed_events
+    ]
+
+
+def run_left_time_matcher(
+    players: list[dict[str, Any]],
+    repeats: int
+) -> dict[str, Any]:
+    def run_legacy() -> list[list[tuple[str, float, float | None]]]:
+        return [legacy_player_lifetimes(player) for player in players]
+
+    def run_batched() -> list[list[tuple[str, float, float | None]]]:
+        return [batched_player_lifetimes(player) for player in players]
+
+    legacy = run_legacy()
+    # What the builder emits, so the check covers iter_player_place_samples too.
+    batched = [
+        [
+            (ward_type, sample.event_time_sec, sample.lifetime_sec)
+            for ward_type, _, _, sample in builder.iter_player_place_samples(0, player)
+        ]
+        for player in players
+    ]
+    return {
+        "placements": sum(len(rows) for rows in legacy),
+        "matched": sum(1 for rows in legacy for row in rows if row[2] is not None),
+        "mismatched_players": sum(
+            1 for new_rows, old_rows in zip(batched, legacy) if new_rows != old_rows
+        ),
+        "legacy": time_call(run_legacy, repeats),
+        "batched": time_call(run_batched, repeats)
+    }
+
+
+def bench_left_time_matcher(args: argparse.Namespace) -> dict[str, Any]:
+    rng = random.Random(41)
+    players = [
+        player
+        for _ in range(args.matches)
+        for player in synthetic_match_players(rng, 90 * 60.0)
+    ]
+    out: dict[str, Any] = {"matches": args.matches, **run_left_time_matcher(players, args.repeats)}
+    # Sentry spam: every support sentry lands on a handful of shared spots with
+    # no ehandle, so the legacy matcher's per-coordinate lists grow to thousands
+    # of left times and each placement bisects and deletes from one of them.
+    spam_matches = max(1, args.matches // LEFT_TIME_SPAM_MATCH_DIVISOR)
+    spam_players = [
+        player
+        for _ in range(spam_matches)
+        for player in synthetic_match_players(
+            rng,
+            90 * 60.0,
+            support_sentries=LEFT_TIME_SPAM_SENTRIES,
+            spot_count=LEFT_TIME_SPAM_SPOTS,
+            ehandle_rate=0.0
+        )
+    ]
+    out["sentry_spam"] = {
+        "matches": spam_matches,
+        **run_left_time_matcher(spam_players, args.repeats)
+    }
+    mismatched = 0
+    for label, row in (("typical", out), ("sentry_spam", out["sentry_spam"])):
+        mismatched += row["mismatched_players"]
+        print(
+            f"  {label:11} matches={row['matches']} placements={row['placements']} "
+            f"matched={row['matched']} mismatched_players={row['mismatched_players']}"
+        )
+        print(
+            f"  {label:11} legacy  median_ms={row['legacy']['median_ms']:.3f}\n"
+            f"  {label:11} batched median_ms={row['batched']['median_ms']:.3f}"
+        )
+    if mismatched:
+        raise SystemExit(f"left-time-matcher: {mismatched} player(s) got different lifetimes")
+    return out
+
+
+def synthetic_match_payload(rng: random.Random, match_id: int) -> dict[str, Any]:
+    """An OpenDota-shaped match response: the ward logs extraction reads next to
+    the chat, teamfights, per-minute arrays and item logs it does not."""
+    minutes = 91
+    players = synthetic_match_players(rng, minutes * 60.0)
+    for player in players:
+        player.update(
+            {
+                "account_id": rng.randint(1, 1 << 31),
+                "hero_id": rng.randint(1, 140),
+                "rank_tier": rng.choice((None, 0, 25, 54, 80)),
+                "personaname": rng.choice(('ward "bot"', "[tag] {x}", "\u00e9t\u00e9 \\o/", "plain")),
+                "gold_t": [rng.randint(0, 60000) for _ in range(minutes)],
+                "xp_t": [rng.randint(0, 60000) for _ in range(minutes)],
+                "lh_t": [rng.randint(0, 900) for _ in range(minutes)],
+                "times": list(range(0, minutes * 60, 60)),
+                "purchase_log": [
+                    {"time": rng.randint(-90, minutes * 60), "key": f"item_{rng.randint(1, 300)}"}
+                    for _ in range(60)
+                ],
+                "damage": {f"npc_dota_hero_{index}": rng.randint(0, 40000) for index in range(40)},
+                "cosmetics": [
+                    {"item_id": rng.randint(1, 99999), "name": "Cosmetic [set] {piece}", "rarity": None}
+                    for _ in range(12)
+                ],
+                "benchmarks": {
+                    name: {"raw": rng.random() * 900, "pct": rng.random()}
+                    for name in ("gold_per_min", "xp_per_min", "kills_per_min", "last_hits_per_min")
+                }
+            }
+        )
+    return {
+        "match_id": match_id,
+        "patch": rng.choice((55, 56)),
+        "duration": minutes * 60,
+        "radiant_win": rng.random() < 0.5,
+        "radiant_gold_adv": [rng.randint(-30000, 30000) for _ in range(minutes)],
+        "radiant_xp_adv": [rng.randint(-30000, 30000) for _ in range(minutes)],
+        "chat": [
+            {"time": rng.randint(0, minutes * 60), "type": "chat", "key": "gg [wp] {?}", "slot": 3}
+            for _ in range(200)
+        ],
+        "objectives": [
+            {"time": rng.randint(0, minutes * 60), "type": "building_kill", "value": 1e-05}
+            for _ in range(40)
+        ],
+        "teamfights": [
+            {
+                "start": rng.randint(0, minutes * 60),
+                "deaths": rng.randint(1, 10),
+                "players": [
+                    {"deaths_pos": {"120": {"130": 1}}, "ability_uses": {"spell": 2}, "xp_delta": 300}
+                    for _ in range(10)
+                ]
+            }
+            for _ in range(30)
+        ],
+        "players": players
+    }
+
+
+def bench_match_decode(args: argparse.Namespace) -> dict[str, Any]:
+    rng = random.Random(43)
+    # Decoding is per match; a few dozen responses keep the set in memory.
+    bodies = [
+        json.dumps(synthetic_match_payload(rng, match_id)).encode("utf-8")
+        for match_id in range(min(args.matches, 40))
+    ]
+    decoders: dict[str, Callable[[bytes], Any]] = {
+        "json_loads": json.loads,
+        "selective": builder.decode_match_payload
+    }
+    mismatched = 0
+    for match_id, body in enumerate(bodies):
+        full, selective = (decode(body) for decode in decoders.values())
+        expected = [repr(record) for record in builder.extract_match_samples(match_id, full) or []]
+        actual = [repr(record) for record in builder.extract_match_samples(match_id, selective) or []]
+        mismatched += expected != actual
+    out: dict[str, Any] = {
+        "matches": len(bodies),
+        "bytes_median": int(statistics.median(len(body) for body in bodies)),
+        "mismatched_matches": mismatched
+    }
+    for name, decode in decoders.items():
+        peaks: list[int] = []
+        for body in bodies:
+            tracemalloc.start()
+            decode(body)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        timing = time_call(lambda: [decode(body) for body in bodies], args.repeats)
+        out[name] = {
+            "median_ms_per_match": round(timing["median_ms"] / len(bodies), 3),
+            "peak_kib_per_match": round(statistics.mean(peaks) / 1024, 1)
+        }
+    print(
+        f"  matches={out['matches']} bytes_median={out['bytes_median']} "
+        f"mismatched_matches={mismatched}"
+    )
+    for name in decoders:
+        print(
+            f"  {name:10} median_ms_per_match={out[name]['median_ms_per_match']:.3f} "
+            f"peak_kib_per_match={out[name]['peak_kib_per_match']:.1f}"
+        )
+    if mismatched:
+        raise SystemExit(f"match-decode: {mismatched} match(es) extracted differently")
+    return out
+
+
+@dataclass
+class StageFixture:
+    days: list[tuple[str, list[int]]]
+    payloads: dict[int, dict[str, Any]]
+    records: dict[int, list[builder.PlacementRecord]]
+
+    @property
+    def placements(self) -> int:
+        return sum(len(rows) for rows in self.records.values())
+
+
+@functools.lru_cache(maxsize=None)
+def stage_fixture(dataset: Path, matches: int) -> StageFixture:
+    """The same synthetic matches for every stage case of a run."""
+    hotspots = synthetic.load_hotspots(dataset, 1.0)
+    config = synthetic.SyntheticConfig(
+        seed=STAGE_SEED,
+        observers_per_match=synthetic.DEFAULT_OBSERVERS_PER_MATCH,
+        sentries_per_match=synthetic.DEFAULT_SENTRIES_PER_MATCH,
+        background_share=synthetic.DEFAULT_BACKGROUND_SHARE,
+        left_noise=synthetic.DEFAULT_LEFT_NOISE,
+        patch=synthetic.DEFAULT_PATCH,
+        payload_filler=False
+    )
+    days = synthetic.split_days(
+        matches, STAGE_DAYS, date(2026, 1, STAGE_DAYS), synthetic.DEFAULT_FIRST_MATCH_ID
+    )
+    payloads = {
+        match_id: synthetic.synthetic_match(match_id, hotspots, config)
+        for _, match_ids in days
+        for match_id in match_ids
+    }
+    records = {
+        match_id: builder.extract_match_samples(match_id, payload) or []
+        for match_id, payload in payloads.items()
+    }
+    return StageFixture(days, payloads, records)
+
+
+def stage_groups(args: argparse.Namespace) -> dict[tuple[str, str, str], builder.SpatialGroupIndex]:
+    fixture = stage_fixture(args.dataset, args.stage_matches)
+    return builder.cluster_placements(
+        builder.iter_runtime_records(fixture.records),
+        builder.BuildParams()
+    )
+
+
+def bench_daily_load(args: argparse.Namespace) -> dict[str, Any]:
+    fixture = stage_fixture(args.dataset, args.stage_matches)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = Path(tmp)
+        for daily_date, match_ids in fixture.days:
+            builder._write_daily_batch_file(
+                cache_dir,
+                daily_date,
+                {match_id: fixture.records[match_id] for match_id in match_ids},
+                source="bench"
+            )
+        loaded, used = builder.load_match_cache_from_daily_files(cache_dir, len(fixture.days))
+        out = {
+            "files": len(used),
+            "bytes": sum(path.stat().st_size for path in cache_dir.glob("*.json")),
+            "matches": len(loaded),
+            "placements": sum(len(rows) for rows in loaded.values()),
+            "load": time_call(
+                lambda: builder.load_match_cache_from_daily_files(cache_dir, len(fixture.days)),
+                args.stage_repeats
+            )
+        }
+    print(
+        f"  files={out['files']} bytes={out['bytes']} matches={out['matches']} "
+        f"placements={out['placements']} median_ms={out['load']['median_ms']:.3f}"
+    )
+    if out["placements"] != fixture.placements:
+        raise SystemExit(
+            f"daily-load: loaded {out['placements']} placements, wrote {fixture.placements}"
+        )
+    return out
+
+
+def bench_extract(args: argparse.Namespace) -> dict[str, Any]:
+    fixture = stage_fixture(args.dataset, args.stage_matches)
+    payloads = list(fixture.payloads.items())
+
+    def run_extract() -> None:
+        for match_id, payload in payloads:
+            builder.extract_match_samples(match_id, payload)
+
+    timing = time_call(run_extract, args.stage_repeats)
+    out = {
+        "matches": len(payloads),
+        "placements": fixture.placements,
+        "extract": timing,
+        "median_ms_per_match": round(timing["median_ms"] / max(1, len(payloads)), 4)
+    }
+    print(
+        f"  matches={out['matches']} placements={out['placements']} "
+        f"median_ms={timing['median_ms']:.3f} "
+        f"median_ms_per_match={out['median_ms_per_match']:.4f}"
+    )
+    return out
+
+
+def bench_cluster(args: argparse.Namespace) -> dict[str, Any]:
+    fixture = stage_fixture(args.dataset, args.stage_matches)
+    records = list(builder.iter_runtime_records(fixture.records))
+    params = builder.BuildParams()
+    groups = builder.cluster_placements(records, params)
+    out = {
+        "placements": len(records),
+        "groups": len(groups),
+        "spots": sum(len(group.spots) for group in groups.values()),
+        "cluster": time_call(lambda: builder.cluster_placements(records, params), args.stage_repeats)
+    }
+    print(
+        f"  placements={out['placements']} groups={out['groups']} spots={out['spots']} "
+        f"median_ms={out['cluster']['median_ms']:.3f}"
+    )
+    return out
+
+
+def bench_spot_payload(args: argparse.Namespace) -> dict[str, Any]:
+    fixture = stage_fixture(args.dataset, args.stage_matches)
+    groups = stage_groups(args)
+    aggregates = builder.aggregate_groups(groups)
+    params = builder.BuildParams()
+    spots = [spot for group_spots in aggregates.values() for spot in group_spots]
+
+    def run_payloads() -> None:
+        for spot in spots:
+            builder.build_spot_payload(
+                spot,
+                total_matches=len(fixture.records),
+                observer_max_quick_deward_rate=params.observer_max_quick_deward_rate,
+                quick_deward_sec=params.quick_deward_sec,
+                success_lifetime_sec=params.success_lifetime_sec
+            )
+
+    out = {
+        "spots": len(spots),
+        "aggregate": time_call(lambda: builder.aggregate_groups(groups), args.stage_repeats),
+        "payload": time_call(run_payloads, args.stage_repeats)
+    }
+    print(
+        f"  spots={out['spots']} aggregate_median_ms={out['aggregate']['median_ms']:.3f} "
+        f"payload_median_ms={out['payload']['median_ms']:.3f}"
+    )
+    return out
+
+
+def bench_counter_sentry_scores(args: argparse.Namespace) -> dict[str, Any]:
+    fixture = stage_fixture(args.dataset, args.stage_matches)
+    aggregates = builder.aggregate_groups(stage_groups(args))
+    params = builder.BuildParams()
+    # build_runtime_spots' pass 1: the payloads apply_counter_sentry_scores sees.
+    group_payloads = {
+        key: [
+            builder.build_spot_payload(
+                spot,
+                total_matches=len(fixture.records),
+                observer_max_quick_deward_rate=params.observer_max_quick_deward_rate,
+                quick_deward_sec=params.quick_deward_sec,
+                success_lifetime_sec=params.success_lifetime_sec
+            )
+            for spot in group_spots
+            if spot.placements >= params.min_placements and spot.matches_seen >= params.min_matches
+        ]
+        for key, group_spots in aggregates.items()
+    }
+
+    def fresh_payloads() -> dict[tuple[str, str, str], list[dict[str, Any]]]:
+        # Scores are boosted in place, so every repeat starts from a copy.
+        return {
+            key: [dict(payload, stats=dict(payload["stats"])) for payload in payloads]
+            for key, payloads in group_payloads.items()
+        }
+
+    out = {
+        "observers": sum(len(rows) for key, rows in group_payloads.items() if key[0] == "Observer"),
+        "sentries": sum(len(rows) for key, rows in group_payloads.items() if key[0] == "Sentry"),
+        "apply": time_prepared(
+            fresh_payloads, builder.apply_counter_sentry_scores, args.stage_repeats
+        )
+    }
+    print(
+        f"  observers={out['observers']} sentries={out['sentries']} "
+        f"median_ms={out['apply']['median_ms']:.3f}"
+    )
+    return out
+
+
+def bench_runtime_write(args: argparse.Namespace) -> dict[str, Any]:
+    fixture = stage_fixture(args.dataset, args.stage_matches)
+    params = builder.BuildParams()
+    result = builder.build_runtime(
+        builder.iter_runtime_records(fixture.records),
+        total_matches=len(fixture.records),
+        params=params
+    )
+    payload = builder.build_runtime_payload(
+        result, params=params, source={"mode": "bench", "matches_used": len(fixture.records)}
+    )
+    daily_date, match_ids = fixture.days[0]
+    batch = {match_id: fixture.records[match_id] for match_id in match_ids}
+    with tempfile.TemporaryDirectory() as tmp:
+        runtime_path = Path(tmp) / "runtime.json"
+        builder.write_json(runtime_path, payload)
+        batch_path = builder._write_daily_batch_file(Path(tmp), daily_date, batch, source="bench")
+        out = {
+            "spots": len(result.spots),
+            "runtime_bytes": runtime_path.stat().st_size,
+            "batch_bytes": batch_path.stat().st_size if batch_path is not None else 0,
+            "runtime": time_call(
+                lambda: builder.write_json(runtime_path, payload), args.stage_repeats
+            ),
+            "daily_batch": time_call(
+                lambda: builder._write_daily_batch_file(Path(tmp), daily_date, batch, "bench"),
+                args.stage_repeats
+            )
+        }
+    print(
+        f"  backend={builder.JSON_BACKEND} spots={out['spots']} "
+        f"runtime_bytes={out['runtime_bytes']} batch_bytes={out['batch_bytes']}"
+    )
+    print(
+        f"  runtime     median_ms={out['runtime']['median_ms']:.3f}\n"
+        f"  daily_batch median_ms={out['daily_batch']['median_ms']:.3f}"
+    )
+    return out
+
+
+def bench_contact_sheet(args: argparse.Namespace) -> dict[str, Any]:
+    try:
+        import render_ward_reco_map as render
+        from PIL import Image
+    except ImportError as exc:
+        print(f"  skipped: {exc}")
+        return {"skipped": str(exc)}
+    payload, _ = builder.load_runtime_payload(Path(args.dataset))
+    base_map = Image.open(render.DEFAULT_MAP).convert("RGBA")
+    top_n, min_cell_dist, panel_size = 8, 3.0, 380
+    out = {
+        "spots": len(payload["spots"]),
+        "render": time_call(
+            lambda: render.build_contact_sheet(payload, base_map, top_n, min_cell_dist, panel_size),
+            args.stage_repeats
+        )
+    }
+    print(f"  spots={out['spots']} median_ms={out['render']['median_ms']:.3f}")
+    return out
+
+
+def bench_quality_diff(args: argparse.Namespace) -> dict[str, Any]:
+    payload, _ = builder.load_runtime_payload(Path(args.dataset))
+    rng = random.Random(48)
+    # A plausible next build: centroids moved by up to a few dozen world units,
+    # scores shifted by up to 10%, so matching, drift and ranking all do work.
+    jittered = {
+        "spots": [
+            dict(
+                spot,
+                world_avg={
+                    "x": spot["world_avg"]["x"] + rng.uniform(-60.0, 60.0),
+                    "y": spot["world_avg"]["y"] + rng.uniform(-60.0, 60.0)
+                },
+                stats=dict(spot["stats"], score=spot["stats"]["score"] * rng.uniform(0.9, 1.1))
+            )
+            for spot in payload["spots"]
+        ]
+    }
+    identical = quality.diff_runtime(payload, payload)["summary"]
+    summary = quality.diff_runtime(payload, jittered)["summary"]
+    out = {
+        "spots": len(payload["spots"]),
+        "jittered_summary": summary,
+        "diff": time_call(lambda: quality.diff_runtime(payload, jittered), args.repeats)
+    }
+    print(
+        f"  spots={out['spots']} matched={summary['matched']} "
+        f"rank_correlation={summary['rank_correlation']} "
+        f"top_n_overlap_mean={summary['top_n_overlap_mean']} "
+        f"median_ms={out['diff']['median_ms']:.3f}"
+    )
+    if (
+        identical["matched"] != len(payload["spots"])
+        or identical["top_n_overlap_min"] not in (None, 1.0)
+        or identical["rank_correlation"] not in (None, 1.0)
+    ):
+        raise SystemExit(f"quality-diff: diffing the dataset against itself gave {identical}")
+    return out
+
+
+def iter_regression_metrics(value: Any, path: tuple[str, ...] = ()) -> Iterator[tuple[str, float]]:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from iter_regression_metrics(item, path + (str(key),))
+    elif path and path[-1].startswith(REGRESSION_METRIC_PREFIXES) and _finite(value):
+        yield ".".join(path), float(value)
+
+
+def compare_results(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    threshold: float,
+    min_delta: float
+) -> list[str]:
+    """Prints every shared metric against the baseline; returns the regressed ones.
+    A metric regresses when it grew by more than threshold (a fraction) and by
+    more than min_delta in its own unit, so sub-millisecond jitter is ignored."""
+    if baseline.get("settings") != current.get("settings"):
+        print(
+            "warning: baseline was run with different settings "
+            f"({baseline.get('settings')} vs {current.get('settings')})",
+            file=sys.stderr
+        )
+    # Result files from before the baseline format hold the cases at top level.
+    old = dict(iter_regression_metrics(baseline.get("cases", baseline)))
+    new = dict(iter_regression_metrics(current.get("cases", current)))
+    regressions: list[str] = []
+    for name, value in new.items():
+        previous = old.get(name)
+        if previous is None:
+            continue
+        change = (value - previous) / previous if previous > 0 else 0.0
+        regressed = change > threshold and value - previous > min_delta
+        if regressed:
+            regressions.append(name)
+        print(
+            f"  {'REGRESSION' if regressed else 'ok':10} {name:60} "
+            f"{previous:>10.3f} -> {value:>10.3f} ({change:+.1%})"
+        )
+    missing = sorted(set(old) - set(new))
+    if missing:
+        print(f"  not in current results: {', '.join(missing)}")
+    return regressions
+
+
+BENCHMARKS: dict[str, Callable[[argparse.Namespace], dict[str, Any]]] = {
+    "runtime-layout": bench_runtime_layout,
+    "declutter": bench_declutter,
+    "spatial-index": bench_spatial_index,
+    "counter-sentry": bench_counter_sentry,
+    "region-pyramid": bench_region_pyramid,
+    "output-validation": bench_output_validation,
+    "json-writer": bench_json_writer,
+    "left-time-matcher": bench_left_time_matcher,
+    "match-decode": bench_match_decode,
+    "daily-load": bench_daily_load,
+    "extract": bench_extract,
+    "cluster": bench_cluster,
+    "spot-payload": bench_spot_payload,
+    "counter-sentry-scores": bench_counter_sentry_scores,
+    "runtime-write": bench_runtime_write,
+    "contact-sheet": bench_contact_sheet,
+    "quality-diff": bench_quality_diff
+}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the ward recommendation pipeline.")
+    ap.add_argument(
+        "cases",
+        nargs="*",
+        default=sorted(BENCHMARKS),
+        help=f"Cases to run (default: all). Available: {', '.join(sorted(BENCHMARKS))}."
+    )
+    ap.add_argument("--dataset", type=Path, default=DEFAULT_DATASET)
+    ap.add_argument("--repeats", type=int, default=20)
+    ap.add_argument("--queries", type=int, default=2000, help="Queries for spatial-index and counter-sentry.")
+    ap.add_argument("--matches", type=int, default=200, help="Synthetic matches for left-time-matcher (match-decode uses at most 40).")
+    ap.add_argument("--stage-matches", type=int, default=1000, help="Synthetic matches for the pipeline stage cases.")
+    ap.add_argument("--stage-repeats", type=int, default=5, help="Repeats for the pipeline stage cases.")
+    ap.add_argument("--json-out", type=Path, default=None, help="Write the results here, e.g. as a new baseline.")
+    ap.add_argument("--compare", type=Path, default=None, metavar="BASELINE", help="Flag regressions against a --json-out file.")
+    ap.add_argument("--results", type=Path, default=None, help="With --compare: compare this results file instead of running cases.")
+    ap.add_argument("--threshold", type=float, default=0.15, help="Relative growth --compare flags (0.15 = 15%%).")
+    ap.add_argument("--min-delta", type=float, default=0.05, help="Smallest absolute growth (ms or KiB) --compare flags.")
+    args = ap.parse_args()
+
+    if args.results is not None:
+        if args.compare is None:
+            ap.error("--results needs --compare")
+        current = json.loads(args.results.read_text(encoding="utf-8"))
+    else:
+        unknown = [case for case in args.cases if case not in BENCHMARKS]
+        if unknown:
+            print(f"unknown benchmark case(s): {', '.join(unknown)}", file=sys.stderr)
+            return 2
+        args.dataset = args.dataset.expanduser().resolve()
+        results: dict[str, Any] = {}
+        for case in args.cases:
+            print(f"{case}:")
+            results[case] = BENCHMARKS[case](args)
+        current = {
+            "schema_version": BENCH_RESULTS_SCHEMA_VERSION,
+            "generated_at_utc": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "json_backend": builder.JSON_BACKEND,
+            "settings": {
+                name: getattr(args, name)
+                for name in ("repeats", "queries", "matches", "stage_matches", "stage_repeats")
+            },
+            "cases": results
+        }
+    if args.json_out is not None:
+        args.json_out.parent.mkdir(parents=True, exist_ok=True)
+        args.json_out.write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+    if args.compare is not None:
+        print(f"compare against {args.compare} (threshold {args.threshold:.0%}):")
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare_results(baseline, current, args.threshold, args.min_delta)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+
+"""
+diff_ward_reco_runtime.py
+
+Output-quality diff between two runtime datasets, e.g. before and after a
+clustering or scoring change, or last night's build against tonight's.
+
+Spots are matched one-to-one within each (type, team, time bucket), closest
+centroids first and within --match-radius-world, the way the builder carries
+spot ids over. Per group and overall it reports:
+  - added / removed spots (unmatched in the old / new file),
+  - centroid drift of matched spots (world units: mean, p90, max),
+  - Spearman rank correlation of matched spots' scores,
+  - top-N overlap: the share of the old top-N, selected as
+    render_ward_reco_map.select_top does (score order, greedy --min-cell-dist
+    spacing), whose matched spot is in the new top-N.
+
+--min-top-overlap / --min-rank-correlation turn it into a gate: the exit
+status is 1 when any group with a selection falls below them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import statistics
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+import build_ward_reco_runtime as builder
+
+DEFAULT_TOP_N = 8
+DEFAULT_MIN_CELL_DIST = 3.0
+
+GroupKey = tuple[str, str, str]
+
+
+def group_spots(spots: list[dict[str, Any]]) -> dict[GroupKey, list[dict[str, Any]]]:
+    groups: dict[GroupKey, list[dict[str, Any]]] = defaultdict(list)
+    for spot in spots:
+        groups[(spot["type"], spot["team"], spot["time_bucket"])].append(spot)
+    return groups
+
+
+def match_spots(
+    old_spots: list[dict[str, Any]],
+    new_spots: list[dict[str, Any]],
+    radius_world: float
+) -> dict[int, tuple[int, float]]:
+    """Old index -> (new index, distance) for one group, closest pairs first.
+    New centroids are binned by radius, so each old spot only looks at the
+    3x3 bins around it."""
+    radius = max(1.0, radius_world)
+    bins: dict[tuple[int, int], list[int]] = defaultdict(list)
+    for new_index, spot in enumerate(new_spots):
+        world = spot["world_avg"]
+        bins[(math.floor(world["x"] / radius), math.floor(world["y"] / radius))].append(new_index)
+    candidates: list[tuple[float, int, int]] = []
+    for old_index, spot in enumerate(old_spots):
+        world_x = spot["world_avg"]["x"]
+        world_y = spot["world_avg"]["y"]
+        bin_x = math.floor(world_x / radius)
+        bin_y = math.floor(world_y / radius)
+        for offset_x in (-1, 0, 1):
+            for offset_y in (-1, 0, 1):
+                for new_index in bins.get((bin_x + offset_x, bin_y + offset_y), ()):
+                    world = new_spots[new_index]["world_avg"]
+                    distance = math.hypot(world["x"] - world_x, world["y"] - world_y)
+                    if distance <= radius_world:
+                        candidates.append((distance, old_index, new_index))
+    candidates.sort()
+    matched: dict[int, tuple[int, float]] = {}
+    taken: set[int] = set()
+    for distance, old_index, new_index in candidates:
+        if old_index in matched or new_index in taken:
+            continue
+        matched[old_index] = (new_index, distance)
+        taken.add(new_index)
+    return matched
+
+
+def average_ranks(values: list[float]) -> list[float]:
+    order = sorted(range(len(values)), key=lambda index: values[index])
+    ranks = [0.0] * len(values)
+    start = 0
+    while start < len(order):
+        end = start
+        while end + 1 < len(order) and values[order[end + 1]] == values[order[start]]:
+            end += 1
+        for position in range(start, end + 1):
+            ranks[order[position]] = (start + end) / 2.0
+        start = end + 1
+    return ranks
+
+
+def rank_correlation(xs: list[float], ys: list[float]) -> float | None:
+    """Spearman's rho with average ranks for ties; None when undefined."""
+    if len(xs) < 2:
+        return None
+    rank_x = average_ranks(xs)
+    rank_y = average_ranks(ys)
+    mean = (len(xs) - 1) / 2.0
+    covariance = sum((a - mean) * (b - mean) for a, b in zip(rank_x, rank_y))
+    spread_x = math.sqrt(sum((a - mean) ** 2 for a in rank_x))
+    spread_y = math.sqrt(sum((b - mean) ** 2 for b in rank_y))
+    if spread_x == 0 or spread_y == 0:
+        return None
+    return covariance / (spread_x * spread_y)
+
+
+def select_top(spots: list[dict[str, Any]], top_n: int, min_cell_dist: float) -> list[int]:
+    """Indices render_ward_reco_map.select_top would pick, best first."""
+    return builder.rank_decluttered_spots(
+        spots,
+        min_cell_distance=min_cell_dist,
+        min_minimap_distance=0.0,
+        region_quota=0,
+        region_size=1.0,
+        limit=top_n
+    )
+
+
+def diff_group(
+    old_spots: list[dict[str, Any]],
+    new_spots: list[dict[str, Any]],
+    *,
+    match_radius_world: float,
+    top_n: int,
+    min_cell_dist: float
+) -> dict[str, Any]:
+    matched = match_spots(old_spots, new_spots, match_radius_world)
+    drifts = [distance for _, distance in matched.values()]
+    old_scores = [float(old_spots[old_index]["stats"]["score"]) for old_index in matched]
+    new_scores = [
+        float(new_spots[new_index]["stats"]["score"]) for new_index, _ in matched.values()
+    ]
+    old_top = select_top(old_spots, top_n, min_cell_dist)
+    new_top = set(select_top(new_spots, top_n, min_cell_dist))
+    kept_top = sum(
+        1 for old_index in old_top if old_index in matched and matched[old_index][0] in new_top
+    )
+    selected = max(len(old_top), len(new_top))
+    rho = rank_correlation(old_scores, new_scores)
+    return {
+        "old_spots": len(old_spots),
+        "new_spots": len(new_spots),
+        "matched": len(matched),
+        "added": len(new_spots) - len(matched),
+        "removed": len(old_spots) - len(matched),
+        "drift_mean": builder.round_metric(statistics.fmean(drifts), 3) if drifts else None,
+        "drift_p90": builder.round_metric(builder.compute_percentile(drifts, 0.9), 3)
+        if drifts
+        else None,
+        "drift_max": builder.round_metric(max(drifts), 3) if drifts else None,
+        "score_abs_delta_mean": builder.round_metric(
+            statistics.fmean(abs(new - old) for old, new in zip(old_scores, new_scores)), 6
+        )
+        if matched
+        else None,
+        "rank_correlation": builder.round_metric(rho) if rho is not None else None,
+        "top_n_selected": selected,
+        "top_n_overlap": builder.round_metric(kept_top / selected) if selected else None
+    }
+
+
+def diff_runtime(
+    old_payload: dict[str, Any],
+    new_payload: dict[str, Any],
+    *,
+    match_radius_world: float = builder.DEFAULT_SPOT_ID_MATCH_RADIUS_WORLD,
+    top_n: int = DEFAULT_TOP_N,
+    min_cell_dist: float = DEFAULT_MIN_CELL_DIST
+) -> dict[str, Any]:
+    old_groups = group_spots(old_payload["spots"])
+    new_groups = group_spots(new_payload["spots"])
+    groups: list[dict[str, Any]] = []
+    for key in sorted(set(old_groups) | set(new_groups)):
+        row = diff_group(
+            old_groups.get(key, []),
+            new_groups.get(key, []),
+            match_radius_world=match_radius_world,
+            top_n=top_n,
+            min_cell_dist=min_cell_dist
+        )
+        ward_type, team, time_bucket = key
+        groups.append({"type": ward_type, "team": team, "time_bucket": time_bucket, **row})
+
+    matched = sum(row["matched"] for row in groups)
+    correlated = [row for row in groups if row["rank_correlation"] is not None]
+    overlaps = [row["top_n_overlap"] for row in groups if row["top_n_overlap"] is not None]
+    drift_means = [(row["drift_mean"], row["matched"]) for row in groups if row["matched"]]
+    return {
+        "settings": {
+            "match_radius_world": match_radius_world,
+            "top_n": top_n,
+            "min_cell_dist": min_cell_dist
+        },
+        "summary": {
+            "old_spots": sum(row["old_spots"] for row in groups),
+            "new_spots": sum(row["new_spots"] for row in groups),
+            "matched": matched,
+            "added": sum(row["added"] for row in groups),
+            "removed": sum(row["removed"] for row in groups),
+            "drift_mean": builder.round_metric(
+                sum(mean * count for mean, count in drift_means) / matched, 3
+            )
+            if matched
+            else None,
+            # Weighted by matched spots, so tiny groups don't swing it.
+            "rank_correlation": builder.round_metric(
+                sum(row["rank_correlation"] * row["matched"] for row in correlated)
+                / sum(row["matched"] for row in correlated)
+            )
+            if correlated
+            else None,
+            "top_n_overlap_mean": builder.round_metric(statistics.fmean(overlaps))
+            if overlaps
+            else None,
+            "top_n_overlap_min": min(overlaps) if overlaps else None
+        },
+        "groups": groups
+    }
+
+
+def gate_failures(
+    report: dict[str, Any],
+    min_top_overlap: float | None,
+    min_rank_correlation: float | None
+) -> list[str]:
+    failures: list[str] = []
+    for row in report["groups"]:
+        name = f"{row['type']}:{row['team']}:{row['time_bucket']}"
+        overlap = row["top_n_overlap"]
+        if min_top_overlap is not None and overlap is not None and overlap < min_top_overlap:
+            failures.append(f"{name} top_n_overlap={overlap:.3f}")
+        rho = row["rank_correlation"]
+        if min_rank_correlation is not None and rho is not None and rho < min_rank_correlation:
+            failures.append(f"{name} rank_correlation={rho:.3f}")
+    return failures
+
+
+def _format_optional(value: float | None, spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def print_report(report: dict[str, Any]) -> None:
+    for row in report["groups"]:
+        print(
+            f"  {row['type']:8} {row['team']:7} {row['time_bucket']:7} "
+            f"old={row['old_spots']:3} new={row['new_spots']:3} matched={row['matched']:3} "
+            f"+{row['added']:<3} -{row['removed']:<3} "
+            f"drift_mean={_format_optional(row['drift_mean'], '6.1f')} "
+            f"drift_p90={_format_optional(row['drift_p90'], '6.1f')} "
+            f"rho={_format_optional(row['rank_correlation'], '6.3f')} "
+            f"top{report['settings']['top_n']}="
+            f"{_format_optional(row['top_n_overlap'], '.3f')}"
+        )
+    summary = report["summary"]
+    print(
+        f"total: old={summary['old_spots']} new={summary['new_spots']} "
+        f"matched={summary['matched']} added={summary['added']} removed={summary['removed']} "
+        f"drift_mean={_format_optional(summary['drift_mean'], '.1f')} "
+        f"rho={_format_optional(summary['rank_correlation'], '.3f')} "
+        f"top_n_overlap_mean={_format_optional(summary['top_n_overlap_mean'], '.3f')} "
+        f"top_n_overlap_min={_format_optional(summary['top_n_overlap_min'], '.3f')}"
+    )
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Compare recommendations of two runtime datasets.")
+    ap.add_argument("old", type=Path, help="Baseline runtime dataset (either layout).")
+    ap.add_argument("new", type=Path, help="Runtime dataset to check against it.")
+    ap.add_argument(
+        "--match-radius-world",
+        type=float,
+        default=builder.DEFAULT_SPOT_ID_MATCH_RADIUS_WORLD,
+        help="Max centroid distance for two spots to count as the same spot."
+    )
+    ap.add_argument("--top", type=int, default=DEFAULT_TOP_N, help="Top-N selected per group.")
+    ap.add_argument(
+        "--min-cell-dist",
+        type=float,
+        default=DEFAULT_MIN_CELL_DIST,
+        help="Min minimap-cell distance between selected spots, as in render_ward_reco_map.py."
+    )
+    ap.add_argument("--min-top-overlap", type=float, default=None)
+    ap.add_argument("--min-rank-correlation", type=float, default=None)
+    ap.add_argument("--json-out", type=Path, default=None)
+    args = ap.parse_args()
+
+    old_payload, _ = builder.load_runtime_payload(args.old.expanduser().resolve())
+    new_payload, _ = builder.load_runtime_payload(args.new.expanduser().resolve())
+    report = diff_runtime(
+        old_payload,
+        new_payload,
+        match_radius_world=args.match_radius_world,
+        top_n=max(1, args.top),
+        min_cell_dist=args.min_cell_dist
+    )
+    print_report(report)
+    if args.json_out is not None:
+        builder.write_json(args.json_out.expanduser().resolve(), report)
+    failures = gate_failures(report, args.min_top_overlap, args.min_rank_correlation)
+    if failures:
+        print(f"{len(failures)} group(s) below the gate: {'; '.join(failures)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+
+"""
+generate_ward_reco_synthetic.py
+
+Synthetic OpenDota-shaped matches for offline scale testing of the ward
+recommendation pipeline.
+
+Ward placements are drawn from hotspots taken from a runtime dataset: every
+runtime spot becomes a hotspot of its (type, team, time bucket) with a weight
+of placements ** skew, a spread from its radius_p50 and a lifetime mix that
+reproduces its quick-deward and success rates. Each match is seeded from
+(--seed, match id), so the same match comes out the same whatever else is
+written or how many matches are generated around it.
+
+Outputs (any combination):
+  --payload-dir      one <match_id>.json per match, as /matches/{id} returns it;
+                     --payload-filler adds the chat, teamfight, per-minute and
+                     item fields extraction skips, for realistic decode cost.
+  --daily-cache-dir  daily batch files the builder reads with
+                     --build-from-daily-batches, extracted by the builder's own
+                     code and written one match at a time.
+  --raw-archive-dir  a RawPayloadArchive for --reextract-from-archive.
+
+Example: 10k matches over 5 days at twice the observed hotspot skew:
+  python generate_ward_reco_synthetic.py --matches 10000 --days 5 --skew 2 \\
+      --daily-cache-dir /tmp/ward-synth/daily
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+import build_ward_reco_runtime as builder
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_DATASET = HERE / "scripts_files" / "data" / "ward_reco_dataset.runtime.json"
+DEFAULT_FIRST_MATCH_ID = 8_000_000_000
+# Per match, close to the ~86 placements a real match yields after extraction.
+DEFAULT_OBSERVERS_PER_MATCH = 38.0
+DEFAULT_SENTRIES_PER_MATCH = 48.0
+DEFAULT_PATCH = 56
+# Runtime spots are capped per group, so roughly a third of real placements
+# sit in the long tail around them; background wards stand in for it.
+DEFAULT_BACKGROUND_SHARE = 0.3
+DEFAULT_LEFT_NOISE = 0.1
+PLAYER_SLOTS = (0, 1, 2, 3, 4, 128, 129, 130, 131, 132)
+# Share of a team's wards placed by positions 1..5; supports carry most of them.
+PLAYER_WARD_SHARES = (0.04, 0.06, 0.1, 0.35, 0.45)
+# Minimap cells of the playable area; background wards land anywhere inside.
+MINIMAP_MIN = 66.0
+MINIMAP_MAX = 190.0
+# radius_p50 of a 2D normal is sigma * sqrt(2 ln 2).
+RADIUS_P50_PER_SIGMA = math.sqrt(2.0 * math.log(2.0))
+WARD_LOG_NAMES = {
+    "Observer": ("obs_log", "obs_left_log"),
+    "Sentry": ("sen_log", "sen_left_log")
+}
+# Share of long-lived wards that stand until they expire rather than die late.
+EXPIRY_SHARE = 0.4
+
+
+@dataclass
+class Hotspot:
+    ward_type: str
+    team: str
+    time_bucket: str
+    minimap_x: float
+    minimap_y: float
+    sigma_cells: float
+    quick_deward_rate: float
+    success_rate: float
+
+
+@dataclass
+class HotspotPool:
+    """Hotspots of one (type, team, time bucket) and their cumulative weights."""
+
+    bucket: builder.TimeBucket
+    hotspots: list[Hotspot] = field(default_factory=list)
+    cum_weights: list[float] = field(default_factory=list)
+
+    @property
+    def weight(self) -> float:
+        return self.cum_weights[-1] if self.cum_weights else 0.0
+
+    def add(self, hotspot: Hotspot, weight: float) -> None:
+        self.hotspots.append(hotspot)
+        self.cum_weights.append(self.weight + weight)
+
+    def pick(self, rng: random.Random) -> Hotspot:
+        index = bisect.bisect_right(self.cum_weights, rng.random() * self.weight)
+        return self.hotspots[min(index, len(self.hotspots) - 1)]
+
+
+@dataclass
+class SyntheticConfig:
+    seed: int
+    observers_per_match: float
+    sentries_per_match: float
+    background_share: float
+    left_noise: float
+    patch: int
+    payload_filler: bool
+
+
+def load_hotspots(path: Path, skew: float) -> dict[tuple[str, str], list[HotspotPool]]:
+    """Runtime spots as hotspot pools per (type, team), in time bucket order."""
+    payload, _ = builder.load_runtime_payload(path)
+    buckets = {bucket.id: bucket for bucket in builder.TIME_BUCKETS}
+    pools: dict[tuple[str, str, str], HotspotPool] = {}
+    for spot in payload.get("spots", []):
+        bucket = buckets.get(spot.get("time_bucket"))
+        stats = spot.get("stats") or {}
+        world = spot.get("world_avg") or {}
+        placements = stats.get("placements") or 0
+        if bucket is None or placements <= 0 or "x" not in world or "y" not in world:
+            continue
+        hotspot = Hotspot(
+            ward_type=str(spot["type"]),
+            team=str(spot["team"]),
+            time_bucket=bucket.id,
+            minimap_x=(float(world["x"]) + builder.WORLD_ORIGIN_OFFSET) / builder.WORLD_CELL_SIZE,
+            minimap_y=(float(world["y"]) + builder.WORLD_ORIGIN_OFFSET) / builder.WORLD_CELL_SIZE,
+            sigma_cells=(
+                float(stats.get("radius_p50") or 0.0)
+                / RADIUS_P50_PER_SIGMA
+                / builder.WORLD_CELL_SIZE
+            ),
+            quick_deward_rate=float(stats.get("quick_deward_rate") or 0.0),
+            success_rate=float(stats.get("success_rate") or 0.0)
+        )
+        key = (hotspot.ward_type, hotspot.team, bucket.id)
+        pool = pools.setdefault(key, HotspotPool(bucket))
+        pool.add(hotspot, float(placements) ** skew)
+    if not pools:
+        raise RuntimeError(f"{path} has no spots to draw hotspots from")
+    out: dict[tuple[str, str], list[HotspotPool]] = {}
+    for bucket in builder.TIME_BUCKETS:
+        for (ward_type, team, bucket_id), pool in sorted(pools.items()):
+            if bucket_id == bucket.id:
+                out.setdefault((ward_type, team), []).append(pool)
+    return out
+
+
+def draw_lifetime(rng: random.Random, hotspot: Hotspot) -> float:
+    """A lifetime whose quick-deward and success shares match the hotspot's."""
+    max_lifetime = builder.MAX_WARD_LIFETIME_BY_TYPE[hotspot.ward_type]
+    quick_sec = float(builder.DEFAULT_QUICK_DEWARD_SEC)
+    success_sec = float(builder.DEFAULT_SUCCESS_LIFETIME_SEC)
+    draw = rng.random()
+    if draw < hotspot.quick_deward_rate:
+        return rng.uniform(1.0, quick_sec)
+    if draw < 1.0 - hotspot.success_rate:
+        low = quick_sec if hotspot.quick_deward_rate > 0 else 1.0
+        return rng.uniform(low, success_sec)
+    if rng.random() < EXPIRY_SHARE:
+        return max_lifetime
+    return rng.uniform(success_sec, max_lifetime)
+
+
+def draw_count(rng: random.Random, mean: float) -> int:
+    return max(0, round(rng.gauss(mean, mean * 0.25)))
+
+
+def _ward_event(
+    log_type: str,
+    event_time: int,
+    slot: int,
+    minimap_x: float,
+    minimap_y: float,
+    ehandle: int | None,
+    left: bool
+) -> dict[str, Any]:
+    event: dict[str, Any] = {
+        "time": event_time,
+        "type": log_type,
+        "key": f"[{int(minimap_x)}, {int(minimap_y)}]",
+        "slot": slot,
+        "x": round(minimap_x, 2),
+        "y": round(minimap_y, 2),
+        "z": 130,
+        "entityleft": left
+    }
+    if ehandle is not None:
+        event["ehandle"] = ehandle
+    return event
+
+
+def synthetic_player_wards(
+    rng: random.Random,
+    player: dict[str, Any],
+    ward_type: str,
+    placements: list[tuple[int, Hotspot | None, float, float]],
+    config: SyntheticConfig,
+    duration_sec: int,
+    ehandles: Iterator[int]
+) -> None:
+    """Fills one player's placement and left logs for one ward type. Left-log
+    noise drops ehandles on either side (forcing the coordinate fallback),
+    reuses a handle the player already had, nudges left coordinates by a cell
+    or loses the left event altogether."""
+    log_name, left_log_name = WARD_LOG_NAMES[ward_type]
+    noise = config.left_noise
+    placed: list[dict[str, Any]] = []
+    left: list[dict[str, Any]] = []
+    used_ehandles: list[int] = []
+    for event_time, hotspot, minimap_x, minimap_y in sorted(placements, key=lambda item: item[0]):
+        if used_ehandles and rng.random() < noise / 4:
+            ehandle = rng.choice(used_ehandles)
+        else:
+            ehandle = next(ehandles)
+        used_ehandles.append(ehandle)
+        placed.append(
+            _ward_event(
+                log_name,
+                event_time,
+                player["player_slot"],
+                minimap_x,
+                minimap_y,
+                None if rng.random() < noise / 2 else ehandle,
+                False
+            )
+        )
+        lifetime = round(
+            draw_lifetime(rng, hotspot)
+            if hotspot is not None
+            else rng.uniform(1.0, builder.MAX_WARD_LIFETIME_BY_TYPE[ward_type])
+        )
+        if event_time + lifetime > duration_sec or rng.random() < noise / 4:
+            continue
+        left_x, left_y = minimap_x, minimap_y
+        if rng.random() < noise:
+            left_x += rng.choice((-1.0, 1.0))
+        left.append(
+            _ward_event(
+                left_log_name,
+                event_time + lifetime,
+                player["player_slot"],
+                left_x,
+                left_y,
+                None if rng.random() < noise / 2 else ehandle,
+                True
+            )
+        )
+    left.sort(key=lambda item: item["time"])
+    player[log_name] = placed
+    player[left_log_name] = left
+
+
+def _draw_placement(
+    rng: random.Random,
+    pools: list[HotspotPool],
+    cum_weights: list[float],
+    config: SyntheticConfig,
+    duration_sec: int
+) -> tuple[int, Hotspot | None, float, float]:
+    pool = pools[min(
+        bisect.bisect_right(cum_weights, rng.random() * cum_weights[-1]),
+        len(pools) - 1
+    )]
+    end_sec = duration_sec if pool.bucket.max_sec is None else min(
+        pool.bucket.max_sec,
+        duration_sec
+    )
+    event_time = rng.randrange(pool.bucket.min_sec, end_sec)
+    if rng.random() < config.background_share:
+        return (
+            event_time,
+            None,
+            rng.uniform(MINIMAP_MIN, MINIMAP_MAX),
+            rng.uniform(MINIMAP_MIN, MINIMAP_MAX)
+        )
+    hotspot = pool.pick(rng)
+    return (
+        event_time,
+        hotspot,
+        rng.gauss(hotspot.minimap_x, hotspot.sigma_cells),
+        rng.gauss(hotspot.minimap_y, hotspot.sigma_cells)
+    )
+
+
+def _rank_tier(rng: random.Random, medal: int) -> int | None:
+    if rng.random() < 0.08:
+        return None
+    medal = min(8, max(1, medal + rng.choice((-1, 0, 0, 0, 1))))
+    return 80 if medal == 8 else medal * 10 + rng.randint(1, 5)
+
+
+def add_payload_filler(rng: random.Random, payload: dict[str, Any]) -> None:
+    """The bulk of a real response that ward extraction never reads."""
+    minutes = payload["duration"] // 60 + 1
+    payload["radiant_gold_adv"] = [rng.randint(-30000, 30000) for _ in range(minutes)]
+    payload["radiant_xp_adv"] = [rng.randint(-30000, 30000) for _ in range(minutes)]
+    payload["chat"] = [
+        {"time": rng.randint(0, payload["duration"]), "type": "chat", "key": "gg wp", "slot": 3}
+        for _ in range(80)
+    ]
+    payload["teamfights"] = [
+        {
+            "start": rng.randint(0, payload["duration"]),
+            "deaths": rng.randint(1, 10),
+            "players": [{"xp_delta": rng.randint(0, 900), "gold_delta": 0} for _ in range(10)]
+        }
+        for _ in range(minutes // 3)
+    ]
+    for player in payload["players"]:
+        player["gold_t"] = [rng.randint(0, 60000) for _ in range(minutes)]
+        player["xp_t"] = [rng.randint(0, 60000) for _ in range(minutes)]
+        player["lh_t"] = [rng.randint(0, 900) for _ in range(minutes)]
+        player["purchase_log"] = [
+            {"time": rng.randint(-90, payload["duration"]), "key": f"item_{rng.randint(1, 300)}"}
+            for _ in range(40)
+        ]
+
+
+def synthetic_match(
+    match_id: int,
+    hotspots: dict[tuple[str, str], list[HotspotPool]],
+    config: SyntheticConfig
+) -> dict[str, Any]:
+    rng = random.Random(f"{config.seed}:{match_id}")
+    duration_sec = int(min(90.0, max(15.0, rng.gauss(40.0, 9.0))) * 60)
+    medal = rng.randint(1, 8)
+    ehandle_base = rng.randint(1 << 10, 1 << 20)
+    ehandles = itertools.count(ehandle_base)
+    players = [
+        {
+            "player_slot": slot,
+            "account_id": rng.randint(1, 1 << 31),
+            "hero_id": rng.randint(1, 140),
+            "rank_tier": _rank_tier(rng, medal)
+        }
+        for slot in PLAYER_SLOTS
+    ]
+    for ward_type, mean in (
+        ("Observer", config.observers_per_match),
+        ("Sentry", config.sentries_per_match)
+    ):
+        for team, team_players in (("radiant", players[:5]), ("dire", players[5:])):
+            pools = [
+                pool
+                for pool in hotspots.get((ward_type, team), [])
+                if pool.bucket.min_sec < duration_sec
+            ]
+            placements_by_player: list[list[tuple[int, Hotspot | None, float, float]]] = [
+                [] for _ in team_players
+            ]
+            if pools:
+                cum_weights = list(itertools.accumulate(pool.weight for pool in pools))
+                for _ in range(draw_count(rng, mean / 2)):
+                    owner = rng.choices(range(len(team_players)), PLAYER_WARD_SHARES)[0]
+                    placements_by_player[owner].append(
+                        _draw_placement(rng, pools, cum_weights, config, duration_sec)
+                    )
+            for player, placements in zip(team_players, placements_by_player):
+                synthetic_player_wards(
+                    rng, player, ward_type, placements, config, duration_sec, ehandles
+                )
+    payload: dict[str, Any] = {
+        "match_id": match_id,
+        "patch": config.patch,
+        "duration": duration_sec,
+        "radiant_win": rng.random() < 0.5,
+        "players": players
+    }
+    if config.payload_filler:
+        add_payload_filler(rng, payload)
+    return payload
+
+
+
+def split_days(
+    matches: int,
+    days: int,
+    end_date: date,
+    first_match_id: int
+) -> list[tuple[str, list[int]]]:
+    """Match ids per daily batch date, newest date first. Ids grow with the
+    date and each day lists its ids newest first, as batch files store them."""
+    days = max(1, min(days, matches)) if matches > 0 else 1
+    out: list[tuple[str, list[int]]] = []
+    next_id = first_match_id
+    for day_index in range(days):
+        count = matches * (day_index + 1) // days - matches * day_index // days
+        day = end_date - timedelta(days=days - 1 - day_index)
+        out.append((day.isoformat(), list(range(next_id + count - 1, next_id - 1, -1))))
+        next_id += count
+    out.reverse()
+    return out
+
+
+def generate(
+    hotspots: dict[tuple[str, str], list[HotspotPool]],
+    config: SyntheticConfig,
+    days: list[tuple[str, list[int]]],
+    payload_dir: Path | None,
+    daily_cache_dir: Path | None,
+    raw_archive: builder.RawPayloadArchive | None
+) -> dict[str, int]:
+    totals = {"matches": 0, "placements": 0, "payload_bytes": 0}
+
+    def iter_day_entries(daily_date: str, match_ids: list[int]) -> Iterator[dict[str, Any]]:
+        for match_id in match_ids:
+            payload = synthetic_match(match_id, hotspots, config)
+            raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            totals["matches"] += 1
+            totals["payload_bytes"] += len(raw)
+            if payload_dir is not None:
+                builder.write_bytes_atomic(payload_dir / f"{match_id}.json", raw)
+            if raw_archive is not None:
+                raw_archive.append(
+                    match_id,
+                    daily_date,
+                    json.dumps(
+                        builder.decode_match_payload(raw),
+                        ensure_ascii=False,
+                        separators=(",", ":")
+                    ).encode("utf-8")
+                )
+            records = builder.extract_match_samples(match_id, payload) or []
+            totals["placements"] += len(records)
+            yield builder.serialize_match_cache_entry(match_id, records)
+
+    for daily_date, match_ids in days:
+        entries = iter_day_entries(daily_date, match_ids)
+        if daily_cache_dir is None:
+            for _ in entries:
+                pass
+            continue
+        builder.write_json(
+            daily_cache_dir / f"{daily_date}.json",
+            {
+                "schema_version": 1,
+                "generated_at_utc": datetime.now(timezone.utc).isoformat(),
+                "source": "synthetic",
+                "matches": entries
+            }
+        )
+    return totals
+
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser(
+        description="Generate synthetic OpenDota-shaped matches and daily batch files."
+    )
+    ap.add_argument("--matches", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument(
+        "--skew",
+        type=float,
+        default=1.0,
+        help=(
+            "Hotspot weight exponent over runtime placements: 1 keeps the observed "
+            "popularity, 0 spreads wards evenly over spots, >1 concentrates them."
+        )
+    )
+    ap.add_argument(
+        "--dataset",
+        type=Path,
+        default=DEFAULT_DATASET,
+        help="Runtime dataset whose spots become hotspots."
+    )
+    ap.add_argument("--observers-per-match", type=float, default=DEFAULT_OBSERVERS_PER_MATCH)
+    ap.add_argument("--sentries-per-match", type=float, default=DEFAULT_SENTRIES_PER_MATCH)
+    ap.add_argument(
+        "--background-share",
+        type=float,
+        default=DEFAULT_BACKGROUND_SHARE,
+        help="Share of wards placed anywhere on the map instead of at a hotspot."
+    )
+    ap.add_argument(
+        "--left-noise",
+        type=float,
+        default=DEFAULT_LEFT_NOISE,
+        help=(
+            "Left-log noise level: missing ehandles, reused handles, shifted left "
+            "coordinates and lost left events."
+        )
+    )
+    ap.add_argument("--patch", type=int, default=DEFAULT_PATCH)
+    ap.add_argument("--days", type=int, default=5, help="Daily batches to spread matches over.")
+    ap.add_argument(
+        "--end-date",
+        default=None,
+        help="Date of the newest daily batch (YYYY-MM-DD, default: today UTC)."
+    )
+    ap.add_argument("--first-match-id", type=int, default=DEFAULT_FIRST_MATCH_ID)
+    ap.add_argument("--payload-dir", type=Path, default=None)
+    ap.add_argument("--payload-filler", action="store_true")
+    ap.add_argument("--daily-cache-dir", type=Path, default=None)
+    ap.add_argument("--raw-archive-dir", type=Path, default=None)
+    args = ap.parse_args()
+    if args.payload_dir is None and args.daily_cache_dir is None and args.raw_archive_dir is None:
+        ap.error("nothing to write: pass --payload-dir, --daily-cache-dir or --raw-archive-dir")
+    if args.matches < 0 or args.days < 1:
+        ap.error("--matches must be >= 0 and --days >= 1")
+    if not 0.0 <= args.background_share <= 1.0 or not 0.0 <= args.left_noise <= 1.0:
+        ap.error("--background-share and --left-noise must be within [0, 1]")
+    return args
+
+
+def main() -> int:
+    args = parse_args()
+    end_date = (
+        datetime.now(timezone.utc).date()
+        if args.end_date is None
+        else builder._safe_parse_date(args.end_date)
+    )
+    if end_date is None:
+        raise RuntimeError(f"Invalid --end-date: {args.end_date}")
+    config = SyntheticConfig(
+        seed=args.seed,
+        observers_per_match=args.observers_per_match,
+        sentries_per_match=args.sentries_per_match,
+        background_share=args.background_share,
+        left_noise=args.left_noise,
+        patch=args.patch,
+        payload_filler=args.payload_filler
+    )
+    hotspots = load_hotspots(args.dataset.expanduser().resolve(), args.skew)
+    raw_archive = (
+        builder.RawPayloadArchive(args.raw_archive_dir.expanduser().resolve())
+        if args.raw_archive_dir is not None
+        else None
+    )
+    started_at = time.perf_counter()
+    try:
+        totals = generate(
+            hotspots,
+            config,
+            split_days(args.matches, args.days, end_date, args.first_match_id),
+            args.payload_dir.expanduser().resolve() if args.payload_dir is not None else None,
+            (
+                args.daily_cache_dir.expanduser().resolve()
+                if args.daily_cache_dir is not None
+                else None
+            ),
+            raw_archive
+        )
+    finally:
+        if raw_archive is not None:
+            raw_archive.close()
+    print(
+        f"matches={totals['matches']} placements={totals['placements']} "
+        f"payload_mib={totals['payload_bytes'] / (1 << 20):.1f} "
+        f"hotspots={sum(len(pool.hotspots) for pools in hotspots.values() for pool in pools)} "
+        f"elapsed_sec={time.perf_counter() - started_at:.1f}",
+        file=sys.stderr
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
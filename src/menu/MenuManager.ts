@@ -69,6 +69,7 @@ export class MenuManager {
 	public readonly DynamicRegionSize: Menu.Slider
 	public readonly DynamicDedupeRadius3D: Menu.Slider
 	public readonly HidePlacedWards: Menu.Toggle
+	public readonly CounterEnemyObservers: Menu.Toggle
 	public readonly OnlyAlt: Menu.Toggle
 	public readonly PlaceHelper: Menu.Toggle
 	public readonly PlaceBind: Menu.KeyBind
@@ -124,6 +125,7 @@ export class MenuManager {
 		this.TooltipSize = main.TooltipSize
 		this.TeamFilter = main.TeamFilter
 		this.HidePlacedWards = main.HidePlacedWards
+		this.CounterEnemyObservers = main.CounterEnemyObservers
 		this.OnlyAlt = main.OnlyAlt
 		this.PlaceHelper = main.PlaceHelper
 		this.PlaceBind = main.PlaceBind
@@ -293,6 +295,7 @@ export class MenuManager {
 		this.TooltipSize.IsHidden = hidden
 		this.TeamFilter.IsHidden = hidden
 		this.HidePlacedWards.IsHidden = hidden
+		this.CounterEnemyObservers.IsHidden = hidden
 		this.OnlyAlt.IsHidden = hidden
 		this.PlaceHelper.IsHidden = hidden
 		this.PlaceBind.IsHidden = hidden || !this.PlaceHelper.value
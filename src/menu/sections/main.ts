@@ -5,6 +5,7 @@ export interface MainSectionControls {
 	TooltipSize: Menu.Slider
 	TeamFilter: Menu.Toggle
 	HidePlacedWards: Menu.Toggle
+	CounterEnemyObservers: Menu.Toggle
 	OnlyAlt: Menu.Toggle
 	PlaceHelper: Menu.Toggle
 	PlaceBind: Menu.KeyBind
@@ -16,6 +17,7 @@ export function createMainSection(mainTree: Menu.Node): MainSectionControls {
 		TooltipSize: mainTree.AddSlider("Tooltip font size", 14, 10, 24),
 		TeamFilter: mainTree.AddToggle("Filter by team", false),
 		HidePlacedWards: mainTree.AddToggle("Hide already placed wards", true),
+		CounterEnemyObservers: mainTree.AddToggle("Counter seen enemy observers", true),
 		OnlyAlt: mainTree.AddToggle("Only ALT", false),
 		PlaceHelper: mainTree.AddToggle("Place helper", true),
 		PlaceBind: mainTree.AddKeybind("Place ward key", "Left mouse")
@@ -0,0 +1,100 @@
+import { WardCounterSentryTable } from "./WardCounterSentryTable"
+import { RemoteShardEntry, RemoteWardDataset, WardDataLoader } from "./WardDataLoader"
+import { WardRegionPyramid } from "./WardRegionPyramid"
+import { WardSpatialIndex } from "./WardSpatialIndex"
+import { WardTeam } from "./WardTypes"
+
+interface CachedShard {
+	sha256: string
+	dataset: RemoteWardDataset
+}
+
+/**
+ * Lazily parsed view of the per-(team, time bucket) remote dataset shards.
+ * A shard is read on first use and read again only when its manifest hash changes.
+ */
+export class RemoteShardCache {
+	private entries: RemoteShardEntry[] = []
+	private readonly shards = new Map<string, CachedShard>()
+
+	public get IsAvailable(): boolean {
+		return this.entries.length !== 0
+	}
+
+	/** Re-reads the manifest; false means only the single-file dataset is shipped. */
+	public Refresh(): boolean {
+		this.entries = WardDataLoader.LoadRemoteShardManifest() ?? []
+		return this.IsAvailable
+	}
+
+	public Load(teams: WardTeam[], timeBucket: Nullable<string>): RemoteWardDataset {
+		const out: RemoteWardDataset = { wards: [], selections: [] }
+		// The merged index is only complete if every loaded shard carries one.
+		let spatialIndex: WardSpatialIndex | undefined
+		let isIndexComplete = true
+		for (let i = 0; i < this.entries.length; i++) {
+			const entry = this.entries[i]
+			if (!teams.includes(entry.team)) {
+				continue
+			}
+			if (timeBucket !== undefined && entry.timeBucket !== timeBucket) {
+				continue
+			}
+			const shard = this.getShard(entry)
+			for (let j = 0; j < shard.wards.length; j++) {
+				out.wards.push(shard.wards[j])
+			}
+			for (let j = 0; j < shard.selections.length; j++) {
+				out.selections.push(shard.selections[j])
+			}
+			// Counter-sentry tiles are per (team, bucket), so a missing shard table
+			// only leaves its own lookups empty.
+			if (shard.counterSentry !== undefined) {
+				if (out.counterSentry === undefined) {
+					out.counterSentry = new WardCounterSentryTable(
+						shard.counterSentry.tileCells,
+						shard.counterSentry.gridSize,
+						shard.counterSentry.falloffCells,
+						shard.counterSentry.maxDistanceCells
+					)
+				}
+				out.counterSentry.Merge(shard.counterSentry)
+			}
+			// Pyramid levels are per (team, bucket, type) as well; a level missing
+			// from the merge only sends that selection down the full pass.
+			if (shard.regionPyramid !== undefined) {
+				if (out.regionPyramid === undefined) {
+					out.regionPyramid = new WardRegionPyramid(shard.regionPyramid.topK)
+				}
+				out.regionPyramid.Merge(shard.regionPyramid)
+			}
+			if (shard.spatialIndex === undefined) {
+				isIndexComplete = false
+				continue
+			}
+			if (spatialIndex === undefined) {
+				spatialIndex = new WardSpatialIndex(
+					shard.spatialIndex.tileCells,
+					shard.spatialIndex.gridSize
+				)
+			}
+			if (!spatialIndex.Merge(shard.spatialIndex)) {
+				isIndexComplete = false
+			}
+		}
+		if (isIndexComplete && spatialIndex !== undefined) {
+			out.spatialIndex = spatialIndex
+		}
+		return out
+	}
+
+	private getShard(entry: RemoteShardEntry): RemoteWardDataset {
+		const cached = this.shards.get(entry.path)
+		if (cached !== undefined && cached.sha256 === entry.sha256) {
+			return cached.dataset
+		}
+		const dataset = WardDataLoader.LoadRemoteShard(entry)
+		this.shards.set(entry.path, { sha256: entry.sha256, dataset })
+		return dataset
+	}
+}
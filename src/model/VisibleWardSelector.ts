@@ -1,7 +1,17 @@
 import { Vector3 } from "github.com/octarine-public/wrapper/index"
 
 import { clamp } from "./Utils"
-import { DEFAULT_WARD_TEAMS, WardPoint, WardTeam, WardTypes } from "./WardTypes"
+import { WardCounterSentryTable } from "./WardCounterSentryTable"
+import { WardRegionPyramid } from "./WardRegionPyramid"
+import { WardSpatialIndex } from "./WardSpatialIndex"
+import {
+	DEFAULT_WARD_TEAMS,
+	RankedWardSelection,
+	WardPoint,
+	WardTeam,
+	WardType,
+	WardTypes
+} from "./WardTypes"
 
 const PLACED_WARD_SKIP_RADIUS = 260
 // Keyed directly by time bucket id (matches build_ward_reco_runtime.py TIME_BUCKETS).
@@ -34,11 +44,17 @@ const AUTO_REGION_QUOTA_BASELINE = 3
 
 export interface VisibleWardSelectorContext {
 	remoteWards: WardPoint[]
+	remoteSelections: RankedWardSelection[]
+	remoteSpatialIndex: Nullable<WardSpatialIndex>
+	remoteCounterSentry: Nullable<WardCounterSentryTable>
+	remoteRegionPyramid: Nullable<WardRegionPyramid>
 	customWards: WardPoint[]
 	localTeam: WardTeam | undefined
 	currentBucket: string
 	placedObserver: Vector3[]
 	placedSentry: Vector3[]
+	/** Enemy observers currently seen; each adds its best counter sentry. */
+	enemyObserver: Vector3[]
 	showCustomWards: boolean
 	teamFilterEnabled: boolean
 	dynamicTopPerType: number
@@ -54,8 +70,9 @@ export interface VisibleWardSelectorContext {
 
 export class VisibleWardSelector {
 	public Select(context: VisibleWardSelectorContext): WardPoint[] {
+		const dynamicVisible = this.buildDynamicVisibleWards(context)
 		const remoteVisible = this.dedupeByRadius3D(
-			this.buildDynamicVisibleWards(context),
+			[...dynamicVisible, ...this.selectCounterSentries(context, dynamicVisible)],
 			context.dynamicDedupeRadius3D
 		)
 		if (!context.showCustomWards) {
@@ -125,6 +142,34 @@ export class VisibleWardSelector {
 			)
 		}
 
+		const precomputed = this.selectPrecomputed(
+			context,
+			localTeam,
+			topN,
+			minCellDistance,
+			minMinimapDistance,
+			regionQuota,
+			regionSize
+		)
+		if (precomputed !== undefined) {
+			return precomputed
+		}
+
+		const blockedByPlaced = this.collectBlockedByPlacedWards(context, localTeam)
+		const fromPyramid = this.selectFromRegionPyramid(
+			context,
+			localTeam,
+			topN,
+			minCellDistance,
+			minMinimapDistance,
+			regionQuota,
+			regionSize,
+			blockedByPlaced
+		)
+		if (fromPyramid !== undefined) {
+			return fromPyramid
+		}
+
 		const ownObserver: WardPoint[] = []
 		const ownSentry: WardPoint[] = []
 		for (let i = 0; i < context.remoteWards.length; i++) {
@@ -135,7 +180,11 @@ export class VisibleWardSelector {
 			if (!this.hasWardTeam(ward, localTeam)) {
 				continue
 			}
-			if (this.isWardBlockedByPlacedWards(ward, context)) {
+			if (
+				blockedByPlaced !== undefined
+					? blockedByPlaced.has(ward)
+					: this.isWardBlockedByPlacedWards(ward, context)
+			) {
 				continue
 			}
 			if (ward.type === WardTypes.Observer) {
@@ -175,6 +224,195 @@ export class VisibleWardSelector {
 		return [...observerTop, ...ownSentryTop]
 	}
 
+	/**
+	 * O(topN) path over the builder's decluttered rankings. Undefined when the
+	 * settings match no precomputed preset or a placed ward blocks one of the
+	 * picks, since either changes the greedy result.
+	 */
+	private selectPrecomputed(
+		context: VisibleWardSelectorContext,
+		localTeam: WardTeam,
+		topN: number,
+		minCellDistance: number,
+		minMinimapDistance: number,
+		regionQuota: number,
+		regionSize: number
+	): Nullable<WardPoint[]> {
+		const out: WardPoint[] = []
+		const types: WardType[] = [WardTypes.Observer, WardTypes.Sentry]
+		for (let i = 0; i < types.length; i++) {
+			const selection = context.remoteSelections.find(
+				candidate =>
+					candidate.type === types[i] &&
+					candidate.team === localTeam &&
+					candidate.timeBucket === context.currentBucket &&
+					candidate.minCellDistance === minCellDistance &&
+					candidate.minMinimapDistance === minMinimapDistance &&
+					candidate.regionQuota === regionQuota &&
+					candidate.regionSize === regionSize &&
+					topN <= candidate.maxTopN &&
+					(candidate.excludeRiskyObserver === undefined ||
+						candidate.excludeRiskyObserver ===
+							context.dynamicExcludeRiskyObserver)
+			)
+			if (selection === undefined) {
+				return undefined
+			}
+			const top = selection.wards.slice(0, topN)
+			for (let j = 0; j < top.length; j++) {
+				if (this.isWardBlockedByPlacedWards(top[j], context)) {
+					return undefined
+				}
+				out.push(top[j])
+			}
+		}
+		return out
+	}
+
+	/**
+	 * Region quota pass over the builder's region pyramid, which only lists each
+	 * region's best spots. Undefined when the region size is not a pyramid level
+	 * or a region's listed spots run out, since the full pass may then differ.
+	 */
+	private selectFromRegionPyramid(
+		context: VisibleWardSelectorContext,
+		localTeam: WardTeam,
+		topN: number,
+		minCellDistance: number,
+		minMinimapDistance: number,
+		regionQuota: number,
+		regionSize: number,
+		blockedByPlaced: Nullable<Set<WardPoint>>
+	): Nullable<WardPoint[]> {
+		const pyramid = context.remoteRegionPyramid
+		if (pyramid === undefined || pyramid === null) {
+			return undefined
+		}
+		const accept = (ward: WardPoint, selected: WardPoint[]) => {
+			if (
+				blockedByPlaced !== undefined
+					? blockedByPlaced.has(ward)
+					: this.isWardBlockedByPlacedWards(ward, context)
+			) {
+				return false
+			}
+			if (
+				ward.type === WardTypes.Observer &&
+				context.dynamicExcludeRiskyObserver &&
+				ward.observerRiskyQuickDeward
+			) {
+				return false
+			}
+			return !this.isWardBlockedByDedupeRules(
+				ward,
+				selected,
+				minCellDistance,
+				minMinimapDistance
+			)
+		}
+		const out: WardPoint[] = []
+		const types: WardType[] = [WardTypes.Observer, WardTypes.Sentry]
+		for (let i = 0; i < types.length; i++) {
+			const top = pyramid.Select(
+				localTeam,
+				context.currentBucket,
+				types[i],
+				regionSize,
+				regionQuota,
+				topN,
+				accept
+			)
+			if (top === undefined || top === null) {
+				return undefined
+			}
+			for (let j = 0; j < top.length; j++) {
+				out.push(top[j])
+			}
+		}
+		return out
+	}
+
+	/**
+	 * Best unblocked own sentry against each seen enemy observer, from the
+	 * builder's counter-sentry table. Nothing is added for an observer whose
+	 * best sentry is already shown.
+	 *
+	 * Approximate: the table keeps a tile's top 3 sentries ranked at the tile
+	 * centre, so about 7% of sightings get a sentry other than the best one,
+	 * losing about 1.6% of its signal on average. The bench's counter-sentry
+	 * case fails below 0.9 agreement or above 2.5% mean signal lost.
+	 */
+	private selectCounterSentries(
+		context: VisibleWardSelectorContext,
+		shown: WardPoint[]
+	): WardPoint[] {
+		const out: WardPoint[] = []
+		const table = context.remoteCounterSentry
+		const localTeam = context.localTeam
+		if (table === undefined || table === null || localTeam === undefined) {
+			return out
+		}
+		const taken = new Set(shown)
+		for (let i = 0; i < context.enemyObserver.length; i++) {
+			const observer = context.enemyObserver[i]
+			const candidates = table.Lookup(
+				localTeam,
+				context.currentBucket,
+				observer.x,
+				observer.y
+			)
+			for (let j = 0; j < candidates.length; j++) {
+				const sentry = candidates[j]
+				if (this.isWardBlockedByPlacedWards(sentry, context)) {
+					continue
+				}
+				if (!taken.has(sentry)) {
+					taken.add(sentry)
+					out.push(sentry)
+				}
+				break
+			}
+		}
+		return out
+	}
+
+	/**
+	 * Remote wards within PLACED_WARD_SKIP_RADIUS of a same-type placed ward,
+	 * found through the dataset grid. Undefined when there is no grid, in which
+	 * case callers test each candidate with isWardBlockedByPlacedWards.
+	 */
+	private collectBlockedByPlacedWards(
+		context: VisibleWardSelectorContext,
+		localTeam: WardTeam
+	): Nullable<Set<WardPoint>> {
+		const index = context.remoteSpatialIndex
+		if (index === undefined || index === null) {
+			return undefined
+		}
+		const blocked = new Set<WardPoint>()
+		const placedByType: [WardType, Vector3[]][] = [
+			[WardTypes.Observer, context.placedObserver],
+			[WardTypes.Sentry, context.placedSentry]
+		]
+		for (let i = 0; i < placedByType.length; i++) {
+			const [type, placed] = placedByType[i]
+			for (let j = 0; j < placed.length; j++) {
+				const nearby = index.QueryRadius(
+					localTeam,
+					context.currentBucket,
+					type,
+					placed[j].x,
+					placed[j].y,
+					PLACED_WARD_SKIP_RADIUS
+				)
+				for (let k = 0; k < nearby.length; k++) {
+					blocked.add(nearby[k])
+				}
+			}
+		}
+		return blocked
+	}
+
 	private compareWardByRank(a: WardPoint, b: WardPoint): number {
 		const as = this.getWardScore(a)
 		const bs = this.getWardScore(b)
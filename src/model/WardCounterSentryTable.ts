@@ -0,0 +1,101 @@
+import { clamp } from "./Utils"
+import { WardPoint, WardTeam } from "./WardTypes"
+
+// Matches build_ward_reco_runtime.py WORLD_ORIGIN_OFFSET / WORLD_CELL_SIZE.
+const WORLD_ORIGIN_OFFSET = 16384
+const WORLD_CELL_SIZE = 128
+
+/**
+ * Builder-embedded table of the best own sentry spots per grid tile an enemy
+ * observer can be seen in. A lookup re-ranks the tile's few candidates at the
+ * exact sighting with the builder's score * exp(-d / falloff) kernel.
+ */
+export class WardCounterSentryTable {
+	private readonly groups = new Map<string, Map<number, WardPoint[]>>()
+
+	constructor(
+		public readonly tileCells: number,
+		public readonly gridSize: number,
+		public readonly falloffCells: number,
+		public readonly maxDistanceCells: number
+	) {}
+
+	public SetTile(
+		team: WardTeam,
+		timeBucket: string,
+		tileKey: number,
+		sentries: WardPoint[]
+	) {
+		const groupKey = `${team}:${timeBucket}`
+		let tiles = this.groups.get(groupKey)
+		if (tiles === undefined) {
+			tiles = new Map<number, WardPoint[]>()
+			this.groups.set(groupKey, tiles)
+		}
+		tiles.set(tileKey, sentries)
+	}
+
+	/** Copies the other table's tiles in; false when the grids or kernels differ. */
+	public Merge(other: WardCounterSentryTable): boolean {
+		if (
+			other.tileCells !== this.tileCells ||
+			other.gridSize !== this.gridSize ||
+			other.falloffCells !== this.falloffCells ||
+			other.maxDistanceCells !== this.maxDistanceCells
+		) {
+			return false
+		}
+		for (const [groupKey, tiles] of other.groups) {
+			const target = this.groups.get(groupKey)
+			if (target === undefined) {
+				this.groups.set(groupKey, new Map(tiles))
+				continue
+			}
+			for (const [tileKey, sentries] of tiles) {
+				target.set(tileKey, sentries)
+			}
+		}
+		return true
+	}
+
+	/** Sentries of team covering an enemy observer at world (x, y), best first. */
+	public Lookup(team: WardTeam, timeBucket: string, x: number, y: number): WardPoint[] {
+		const tiles = this.groups.get(`${team}:${timeBucket}`)
+		if (tiles === undefined) {
+			return []
+		}
+		const cellX = (x + WORLD_ORIGIN_OFFSET) / WORLD_CELL_SIZE
+		const cellY = (y + WORLD_ORIGIN_OFFSET) / WORLD_CELL_SIZE
+		const candidates = tiles.get(
+			this.tileCoord(cellY) * this.gridSize + this.tileCoord(cellX)
+		)
+		if (candidates === undefined) {
+			return []
+		}
+		const ranked: { sentry: WardPoint; signal: number }[] = []
+		for (let i = 0; i < candidates.length; i++) {
+			const signal = this.getSignal(candidates[i], cellX, cellY)
+			if (signal > 0) {
+				ranked.push({ sentry: candidates[i], signal })
+			}
+		}
+		// Stable sort keeps the builder's order on ties.
+		ranked.sort((a, b) => b.signal - a.signal)
+		return ranked.map(entry => entry.sentry)
+	}
+
+	private getSignal(sentry: WardPoint, cellX: number, cellY: number): number {
+		if (sentry.cellX === undefined || sentry.cellY === undefined) {
+			return 0
+		}
+		const distance = Math.hypot(sentry.cellX - cellX, sentry.cellY - cellY)
+		if (distance > this.maxDistanceCells) {
+			return 0
+		}
+		return (sentry.score ?? 0) * Math.exp(-distance / this.falloffCells)
+	}
+
+	private tileCoord(cell: number): number {
+		return clamp(Math.floor(cell / this.tileCells), 0, this.gridSize - 1)
+	}
+}
@@ -5,8 +5,12 @@ import {
 } from "github.com/octarine-public/wrapper/index"
 
 import { isObjectRecord } from "./Utils"
+import { WardCounterSentryTable } from "./WardCounterSentryTable"
+import { WardRegionNode, WardRegionPyramid } from "./WardRegionPyramid"
+import { WardSpatialIndex } from "./WardSpatialIndex"
 import {
 	DEFAULT_WARD_TEAMS,
+	RankedWardSelection,
 	WardPoint,
 	WardTeam,
 	WardTeams,
@@ -15,6 +19,56 @@ import {
 } from "./WardTypes"
 
 const REMOTE_DATASET_PATH = "data/ward_reco_dataset.runtime.json"
+const REMOTE_SHARD_DIR = "data/ward_reco_runtime_shards"
+const REMOTE_SHARD_MANIFEST_PATH = `${REMOTE_SHARD_DIR}/manifest.json`
+const SHARD_MANIFEST_SCHEMA_VERSION = 1
+const COLUMNAR_SCHEMA_VERSION = 6
+// Matches build_ward_reco_runtime.py RUNTIME_VALIDATOR_VERSION.
+const VALIDATED_MARKER_VERSION = 2
+// Matches build_ward_reco_runtime.py ROWS_CHECKSUM_BASIS and ROWS_CHECKSUM_PRIME.
+const ROWS_CHECKSUM_BASIS = 0x811c9dc5
+const ROWS_CHECKSUM_PRIME = 0x01000193
+const ROWS_CHECKSUM_MISSING = 0xffffffff
+// Columns the client reads from a schema v6 dataset; all must share one length.
+const COLUMNAR_REQUIRED_COLUMNS = [
+	"type",
+	"team",
+	"time_bucket",
+	"cell_x",
+	"cell_y",
+	"world_x",
+	"world_y",
+	"score",
+	"observer_risky_quick_deward"
+] as const
+
+export interface RemoteWardDataset {
+	wards: WardPoint[]
+	selections: RankedWardSelection[]
+	spatialIndex?: WardSpatialIndex
+	counterSentry?: WardCounterSentryTable
+	regionPyramid?: WardRegionPyramid
+}
+
+export interface RemoteShardEntry {
+	team: WardTeam
+	timeBucket: string
+	path: string
+	sha256: string
+}
+
+interface RecoWardFields {
+	type: WardType
+	team: unknown
+	x: number
+	y: number
+	rawZ?: unknown
+	cellX: number
+	cellY: number
+	score: number
+	timeBucket: Nullable<string>
+	observerRiskyQuickDeward: boolean
+}
 
 function parseDatasetTeam(value: unknown): WardTeam[] {
 	if (value === "radiant") {
@@ -127,16 +181,289 @@ function normalizeWardArray(source: unknown): WardPoint[] {
 	return wards
 }
 
-function parseWardRecoDataset(source: unknown): WardPoint[] {
-	if (!isObjectRecord(source)) {
+function createRecoWard(fields: RecoWardFields): WardPoint {
+	const { x, y, cellX, cellY, score, timeBucket } = fields
+	return {
+		x,
+		y,
+		z: resolveWardZ(x, y, fields.rawZ),
+		cellX: Number.isFinite(cellX) ? cellX : undefined,
+		cellY: Number.isFinite(cellY) ? cellY : undefined,
+		timeBucket,
+		score: Number.isFinite(score) ? score : undefined,
+		observerRiskyQuickDeward: fields.observerRiskyQuickDeward,
+		type: fields.type,
+		description: Number.isFinite(score)
+			? `Ward reco (${timeBucket ?? "all"}) score=${score.toFixed(3)}`
+			: `Ward reco (${timeBucket ?? "all"})`,
+		teams: parseDatasetTeam(fields.team)
+	}
+}
+
+// Python round() semantics, so derived spot ids match the builder's.
+function roundHalfEven(value: number): number {
+	const floor = Math.floor(value)
+	if (value - floor !== 0.5) {
+		return Math.round(value)
+	}
+	return floor % 2 === 0 ? floor : floor + 1
+}
+
+// Entries are [row, spot_id] or [row, x, y], the latter replacing only the
+// rounded coordinates of the derived id.
+function parseSpotIDExceptions(value: unknown): Map<number, string | [number, number]> {
+	const out = new Map<number, string | [number, number]>()
+	if (!Array.isArray(value)) {
+		return out
+	}
+	for (let i = 0; i < value.length; i++) {
+		const entry = value[i]
+		if (!Array.isArray(entry)) {
+			continue
+		}
+		if (typeof entry[1] === "string") {
+			out.set(Number(entry[0]), entry[1])
+		} else if (entry.length === 3) {
+			out.set(Number(entry[0]), [Number(entry[1]), Number(entry[2])])
+		}
+	}
+	return out
+}
+
+/**
+ * build_ward_reco_runtime.py runtime_rows_checksum: 32-bit FNV-1a over the
+ * float64 words of numbers, the UTF-16 code units of strings and 0/1 flags.
+ */
+class RowsChecksum {
+	private value = ROWS_CHECKSUM_BASIS
+	private readonly view = new DataView(new ArrayBuffer(8))
+
+	public get Value(): number {
+		return this.value
+	}
+
+	public AddWord(word: number): void {
+		this.value = Math.imul(this.value ^ word, ROWS_CHECKSUM_PRIME) >>> 0
+	}
+
+	public AddNumber(value: unknown): void {
+		if (typeof value !== "number" || Number.isNaN(value)) {
+			this.AddWord(ROWS_CHECKSUM_MISSING)
+			return
+		}
+		this.view.setFloat64(0, value, true)
+		this.AddWord(this.view.getUint32(0, true))
+		this.AddWord(this.view.getUint32(4, true))
+	}
+
+	public AddString(value: unknown): void {
+		if (typeof value !== "string") {
+			this.AddWord(ROWS_CHECKSUM_MISSING)
+			return
+		}
+		this.AddWord(value.length)
+		for (let i = 0; i < value.length; i++) {
+			this.AddWord(value.charCodeAt(i))
+		}
+	}
+
+	public AddFlag(value: unknown): void {
+		this.AddWord(value ? 1 : 0)
+	}
+}
+
+function columnarRowsChecksum(
+	data: Record<string, unknown[]>,
+	dictionaries: Record<string, unknown>
+): number {
+	const checksum = new RowsChecksum()
+	const dictionaryNames = ["type", "team", "time_bucket"] as const
+	for (let i = 0; i < dictionaryNames.length; i++) {
+		const values = dictionaries[dictionaryNames[i]]
+		const names = Array.isArray(values) ? values : []
+		checksum.AddWord(names.length)
+		for (let j = 0; j < names.length; j++) {
+			checksum.AddString(names[j])
+		}
+	}
+	const flagColumn = COLUMNAR_REQUIRED_COLUMNS[COLUMNAR_REQUIRED_COLUMNS.length - 1]
+	for (let i = 0; i < COLUMNAR_REQUIRED_COLUMNS.length; i++) {
+		const name = COLUMNAR_REQUIRED_COLUMNS[i]
+		const column = data[name]
+		for (let j = 0; j < column.length; j++) {
+			if (name === flagColumn) {
+				checksum.AddFlag(column[j])
+			} else {
+				checksum.AddNumber(column[j])
+			}
+		}
+	}
+	return checksum.Value
+}
+
+/**
+ * True when the builder's validation stage signed off on exactly these
+ * columnar rows: schema conformance, finite coordinates, dictionary codes in
+ * range and unique spot ids. The marker's rows checksum is recomputed over
+ * every value the trusted path reads, so a corrupted or hand-edited file falls
+ * back to the per-row checks. It is not keyed, so it guards against accidents,
+ * not against someone who rewrites the checksum too. Schema v5 objects always
+ * take their per-spot checks, which cost less than checksumming the spots.
+ */
+function isValidatedColumnarDataset(
+	source: Record<string, unknown>,
+	data: Record<string, unknown[]>,
+	dictionaries: Record<string, unknown>
+): boolean {
+	const marker = source.validated
+	return (
+		isObjectRecord(marker) &&
+		marker.validator === VALIDATED_MARKER_VERSION &&
+		marker.spots === data.type.length &&
+		typeof marker.rows_checksum === "number" &&
+		marker.rows_checksum === columnarRowsChecksum(data, dictionaries)
+	)
+}
+
+function parseColumnarWardRecoDataset(
+	source: Record<string, unknown>,
+	rows: Nullable<WardPoint>[]
+): WardPoint[] {
+	const columns = isObjectRecord(source.columns) ? source.columns : undefined
+	const dictionaries = isObjectRecord(source.dictionaries)
+		? source.dictionaries
+		: undefined
+	const scales = isObjectRecord(source.scales) ? source.scales : undefined
+	if (columns === undefined || dictionaries === undefined || scales === undefined) {
+		return []
+	}
+	// Validation is per column (type and length), not per spot.
+	const typeColumn = columns.type
+	if (!Array.isArray(typeColumn)) {
+		return []
+	}
+	const length = typeColumn.length
+	const data: Record<string, unknown[]> = {}
+	for (let i = 0; i < COLUMNAR_REQUIRED_COLUMNS.length; i++) {
+		const name = COLUMNAR_REQUIRED_COLUMNS[i]
+		const column = columns[name]
+		if (!Array.isArray(column) || column.length !== length) {
+			console.error(`[ward-helper] invalid columnar dataset column: ${name}`)
+			return []
+		}
+		data[name] = column
+	}
+	const typeNames = Array.isArray(dictionaries.type) ? dictionaries.type : []
+	const teamNames = Array.isArray(dictionaries.team) ? dictionaries.team : []
+	const bucketNames = Array.isArray(dictionaries.time_bucket)
+		? dictionaries.time_bucket
+		: []
+	const worldScale = Number(scales.world)
+	const scoreScale = Number(scales.score)
+	if (!(worldScale > 0) || !(scoreScale > 0)) {
 		return []
 	}
+	if (isValidatedColumnarDataset(source, data, dictionaries)) {
+		return parseValidatedColumns(
+			data,
+			typeNames,
+			teamNames,
+			bucketNames,
+			worldScale,
+			scoreScale,
+			rows
+		)
+	}
+	const spotIDExceptions = parseSpotIDExceptions(source.spot_id_exceptions)
+
+	const wards: WardPoint[] = []
+	const seen = new Set<string>()
+	for (let i = 0; i < length; i++) {
+		const typeName = typeNames[Number(data.type[i])]
+		const type = parseWardType(typeName)
+		if (type === undefined) {
+			continue
+		}
+		const x = Number(data.world_x[i]) / worldScale
+		const y = Number(data.world_y[i]) / worldScale
+		if (!Number.isFinite(x) || !Number.isFinite(y)) {
+			continue
+		}
+		const team = teamNames[Number(data.team[i])]
+		const bucketName = bucketNames[Number(data.time_bucket[i])]
+		const timeBucket =
+			typeof bucketName === "string" && bucketName.length > 0
+				? bucketName
+				: undefined
+		const exception = spotIDExceptions.get(i)
+		const [idX, idY] = Array.isArray(exception)
+			? exception
+			: [roundHalfEven(x), roundHalfEven(y)]
+		const spotID =
+			typeof exception === "string"
+				? exception
+				: `${String(typeName)}:${String(team)}:${String(bucketName)}:` +
+					`${idX}:${idY}`
+		const key = `${type}:${spotID}`
+		if (seen.has(key)) {
+			continue
+		}
+		seen.add(key)
+		const ward = createRecoWard({
+			type,
+			team,
+			x,
+			y,
+			cellX: Number(data.cell_x[i]),
+			cellY: Number(data.cell_y[i]),
+			score: Number(data.score[i]) / scoreScale,
+			timeBucket,
+			observerRiskyQuickDeward: Boolean(data.observer_risky_quick_deward[i])
+		})
+		wards.push(ward)
+		rows[i] = ward
+	}
+	return wards
+}
+
+// Checksummed schema v6 rows: no per-row type, coordinate or duplicate checks.
+function parseValidatedColumns(
+	data: Record<string, unknown[]>,
+	typeNames: unknown[],
+	teamNames: unknown[],
+	bucketNames: unknown[],
+	worldScale: number,
+	scoreScale: number,
+	rows: Nullable<WardPoint>[]
+): WardPoint[] {
+	const types = typeNames.map(parseWardType)
+	const wards: WardPoint[] = []
+	for (let i = 0; i < data.type.length; i++) {
+		const ward = createRecoWard({
+			type: types[data.type[i] as number] as WardType,
+			team: teamNames[data.team[i] as number],
+			x: (data.world_x[i] as number) / worldScale,
+			y: (data.world_y[i] as number) / worldScale,
+			cellX: data.cell_x[i] as number,
+			cellY: data.cell_y[i] as number,
+			score: (data.score[i] as number) / scoreScale,
+			timeBucket: bucketNames[data.time_bucket[i] as number] as string,
+			observerRiskyQuickDeward: Boolean(data.observer_risky_quick_deward[i])
+		})
+		wards.push(ward)
+		rows[i] = ward
+	}
+	return wards
+}
 
+function parseObjectWardRecoDataset(
+	source: Record<string, unknown>,
+	rows: Nullable<WardPoint>[]
+): WardPoint[] {
 	const spotsRaw = source.spots
 	if (!Array.isArray(spotsRaw)) {
 		return []
 	}
-
 	const wards: WardPoint[] = []
 	const seen = new Set<string>()
 	for (let i = 0; i < spotsRaw.length; i++) {
@@ -168,35 +495,336 @@ function parseWardRecoDataset(source: unknown): WardPoint[] {
 		}
 		seen.add(key)
 
-		const cellX = Number(cell.x)
-		const cellY = Number(cell.y)
-		const score = Number(stats.score)
 		const timeBucket =
 			typeof spot.time_bucket === "string" && spot.time_bucket.length > 0
 				? spot.time_bucket
 				: undefined
-		const observerRiskyQuickDeward = Boolean(flags.observer_risky_quick_deward)
 
-		wards.push({
+		const ward = createRecoWard({
+			type,
+			team: spot.team,
 			x,
 			y,
-			z: resolveWardZ(x, y, Number(world.z)),
-			cellX: Number.isFinite(cellX) ? cellX : undefined,
-			cellY: Number.isFinite(cellY) ? cellY : undefined,
+			rawZ: world.z,
+			cellX: Number(cell.x),
+			cellY: Number(cell.y),
+			score: Number(stats.score),
 			timeBucket,
-			score: Number.isFinite(score) ? score : undefined,
-			observerRiskyQuickDeward,
-			type,
-			description: Number.isFinite(score)
-				? `Ward reco (${timeBucket ?? "all"}) score=${score.toFixed(3)}`
-				: `Ward reco (${timeBucket ?? "all"})`,
-			teams: parseDatasetTeam(spot.team)
+			observerRiskyQuickDeward: Boolean(flags.observer_risky_quick_deward)
 		})
+		wards.push(ward)
+		rows[i] = ward
 	}
 
 	return wards
 }
 
+// Lists that reference a spot the loader skipped are dropped, so the client
+// falls back to selecting at runtime.
+function parseSelections(
+	source: unknown,
+	rows: Nullable<WardPoint>[]
+): RankedWardSelection[] {
+	if (!isObjectRecord(source) || !Array.isArray(source.lists)) {
+		return []
+	}
+	const maxTopN = Number(source.max_top_n)
+	if (!Number.isFinite(maxTopN)) {
+		return []
+	}
+	const selections: RankedWardSelection[] = []
+	for (let i = 0; i < source.lists.length; i++) {
+		const list: unknown = source.lists[i]
+		if (!isObjectRecord(list) || !Array.isArray(list.spot_indices)) {
+			continue
+		}
+		const type = parseWardType(list.type)
+		const teams = parseDatasetTeam(list.team)
+		if (type === undefined || teams.length !== 1) {
+			continue
+		}
+		if (typeof list.time_bucket !== "string") {
+			continue
+		}
+		const wards: WardPoint[] = []
+		for (let j = 0; j < list.spot_indices.length; j++) {
+			const ward = rows[Number(list.spot_indices[j])]
+			if (ward === undefined || ward === null) {
+				break
+			}
+			wards.push(ward)
+		}
+		if (wards.length !== list.spot_indices.length) {
+			continue
+		}
+		selections.push({
+			team: teams[0],
+			timeBucket: list.time_bucket,
+			type,
+			minCellDistance: Number(list.min_cell_distance),
+			minMinimapDistance: Number(list.min_minimap_distance),
+			regionQuota: Number(list.region_quota),
+			regionSize: Number(list.region_size),
+			excludeRiskyObserver:
+				typeof list.exclude_risky_observer === "boolean"
+					? list.exclude_risky_observer
+					: undefined,
+			maxTopN,
+			wards
+		})
+	}
+	return selections
+}
+
+// Like parseSelections, a group that references a skipped spot voids the index.
+function parseSpatialIndex(
+	source: unknown,
+	rows: Nullable<WardPoint>[]
+): Nullable<WardSpatialIndex> {
+	if (!isObjectRecord(source) || !Array.isArray(source.groups)) {
+		return undefined
+	}
+	const tileCells = Number(source.tile_cells)
+	const gridSize = Number(source.grid_size)
+	if (!(tileCells > 0) || !Number.isInteger(gridSize) || gridSize <= 0) {
+		return undefined
+	}
+	const index = new WardSpatialIndex(tileCells, gridSize)
+	for (let i = 0; i < source.groups.length; i++) {
+		const group: unknown = source.groups[i]
+		if (!isObjectRecord(group)) {
+			return undefined
+		}
+		const {
+			tile_keys: tileKeys,
+			tile_starts: tileStarts,
+			spot_indices: indices
+		} = group
+		const type = parseWardType(group.type)
+		const teams = parseDatasetTeam(group.team)
+		if (
+			type === undefined ||
+			teams.length !== 1 ||
+			typeof group.time_bucket !== "string" ||
+			!Array.isArray(tileKeys) ||
+			!Array.isArray(tileStarts) ||
+			!Array.isArray(indices) ||
+			tileStarts.length !== tileKeys.length + 1
+		) {
+			return undefined
+		}
+		for (let j = 0; j < tileKeys.length; j++) {
+			const wards: WardPoint[] = []
+			const end = Number(tileStarts[j + 1])
+			for (let k = Number(tileStarts[j]); k < end; k++) {
+				const ward = rows[Number(indices[k])]
+				if (ward === undefined || ward === null) {
+					return undefined
+				}
+				wards.push(ward)
+			}
+			index.SetTile(teams[0], group.time_bucket, type, Number(tileKeys[j]), wards)
+		}
+	}
+	return index
+}
+
+// Tiles only list sentries; one that references a skipped spot voids the table.
+function parseCounterSentryTable(
+	source: unknown,
+	rows: Nullable<WardPoint>[]
+): Nullable<WardCounterSentryTable> {
+	if (!isObjectRecord(source) || !Array.isArray(source.groups)) {
+		return undefined
+	}
+	const tileCells = Number(source.tile_cells)
+	const gridSize = Number(source.grid_size)
+	const falloffCells = Number(source.falloff_cells)
+	const maxDistanceCells = Number(source.max_distance_cells)
+	if (
+		!(tileCells > 0) ||
+		!Number.isInteger(gridSize) ||
+		gridSize <= 0 ||
+		!(falloffCells > 0) ||
+		!(maxDistanceCells > 0)
+	) {
+		return undefined
+	}
+	const table = new WardCounterSentryTable(
+		tileCells,
+		gridSize,
+		falloffCells,
+		maxDistanceCells
+	)
+	for (let i = 0; i < source.groups.length; i++) {
+		const group: unknown = source.groups[i]
+		if (!isObjectRecord(group)) {
+			return undefined
+		}
+		const {
+			tile_keys: tileKeys,
+			tile_starts: tileStarts,
+			spot_indices: indices
+		} = group
+		const teams = parseDatasetTeam(group.team)
+		if (
+			teams.length !== 1 ||
+			typeof group.time_bucket !== "string" ||
+			!Array.isArray(tileKeys) ||
+			!Array.isArray(tileStarts) ||
+			!Array.isArray(indices) ||
+			tileStarts.length !== tileKeys.length + 1
+		) {
+			return undefined
+		}
+		for (let j = 0; j < tileKeys.length; j++) {
+			const sentries: WardPoint[] = []
+			const end = Number(tileStarts[j + 1])
+			for (let k = Number(tileStarts[j]); k < end; k++) {
+				const ward = rows[Number(indices[k])]
+				if (
+					ward === undefined ||
+					ward === null ||
+					ward.type !== WardTypes.Sentry
+				) {
+					return undefined
+				}
+				sentries.push(ward)
+			}
+			table.SetTile(teams[0], group.time_bucket, Number(tileKeys[j]), sentries)
+		}
+	}
+	return table
+}
+
+// Like parseSpatialIndex, a level that references a skipped spot voids the pyramid.
+function parseRegionPyramid(
+	source: unknown,
+	rows: Nullable<WardPoint>[]
+): Nullable<WardRegionPyramid> {
+	if (!isObjectRecord(source) || !Array.isArray(source.groups)) {
+		return undefined
+	}
+	const topK = Number(source.top_k)
+	if (!Number.isInteger(topK) || topK <= 0) {
+		return undefined
+	}
+	const pyramid = new WardRegionPyramid(topK)
+	for (let i = 0; i < source.groups.length; i++) {
+		const group: unknown = source.groups[i]
+		if (!isObjectRecord(group) || !Array.isArray(group.levels)) {
+			return undefined
+		}
+		const type = parseWardType(group.type)
+		const teams = parseDatasetTeam(group.team)
+		if (
+			type === undefined ||
+			teams.length !== 1 ||
+			typeof group.time_bucket !== "string"
+		) {
+			return undefined
+		}
+		for (let j = 0; j < group.levels.length; j++) {
+			const level: unknown = group.levels[j]
+			if (!isObjectRecord(level)) {
+				return undefined
+			}
+			const {
+				node_counts: nodeCounts,
+				node_starts: nodeStarts,
+				spot_indices: indices
+			} = level
+			const regionSize = Number(level.region_size)
+			if (
+				!(regionSize > 0) ||
+				!Array.isArray(nodeCounts) ||
+				!Array.isArray(nodeStarts) ||
+				!Array.isArray(indices) ||
+				nodeStarts.length !== nodeCounts.length + 1
+			) {
+				return undefined
+			}
+			const nodes: WardRegionNode[] = []
+			for (let k = 0; k < nodeCounts.length; k++) {
+				const node: WardRegionNode = {
+					count: Number(nodeCounts[k]),
+					wards: [],
+					spotIndices: []
+				}
+				const end = Number(nodeStarts[k + 1])
+				for (let m = Number(nodeStarts[k]); m < end; m++) {
+					const spotIndex = Number(indices[m])
+					const ward = rows[spotIndex]
+					if (ward === undefined || ward === null) {
+						return undefined
+					}
+					node.wards.push(ward)
+					node.spotIndices.push(spotIndex)
+				}
+				nodes.push(node)
+			}
+			pyramid.SetLevel(teams[0], group.time_bucket, type, regionSize, nodes)
+		}
+	}
+	return pyramid
+}
+
+function parseWardRecoDataset(source: unknown): RemoteWardDataset {
+	if (!isObjectRecord(source)) {
+		return { wards: [], selections: [] }
+	}
+	const rows: Nullable<WardPoint>[] = []
+	const wards =
+		source.schema_version === COLUMNAR_SCHEMA_VERSION &&
+		source.layout === "columnar"
+			? parseColumnarWardRecoDataset(source, rows)
+			: parseObjectWardRecoDataset(source, rows)
+	return {
+		wards,
+		selections: parseSelections(source.selections, rows),
+		spatialIndex: parseSpatialIndex(source.spatial_index, rows) ?? undefined,
+		counterSentry: parseCounterSentryTable(source.counter_sentry, rows) ?? undefined,
+		regionPyramid: parseRegionPyramid(source.region_pyramid, rows) ?? undefined
+	}
+}
+
+function parseShardManifest(source: unknown): Nullable<RemoteShardEntry[]> {
+	if (
+		!isObjectRecord(source) ||
+		source.schema_version !== SHARD_MANIFEST_SCHEMA_VERSION ||
+		source.dataset_type !== "runtime_manifest" ||
+		!Array.isArray(source.shards)
+	) {
+		return undefined
+	}
+	const entries: RemoteShardEntry[] = []
+	for (let i = 0; i < source.shards.length; i++) {
+		const shard: unknown = source.shards[i]
+		if (!isObjectRecord(shard)) {
+			continue
+		}
+		const { time_bucket: timeBucket, path, sha256 } = shard
+		if (shard.team !== "radiant" && shard.team !== "dire") {
+			continue
+		}
+		if (
+			typeof timeBucket !== "string" ||
+			typeof path !== "string" ||
+			typeof sha256 !== "string" ||
+			path.length === 0
+		) {
+			continue
+		}
+		entries.push({
+			team: parseDatasetTeam(shard.team)[0],
+			timeBucket,
+			path,
+			sha256
+		})
+	}
+	return entries
+}
+
 export class WardDataLoader {
 	public static Normalize(source: unknown): WardPoint[] {
 		if (Array.isArray(source)) {
@@ -208,7 +836,7 @@ export class WardDataLoader {
 		return normalizeWardArray(source.wards)
 	}
 
-	public static LoadRemoteWards(): WardPoint[] {
+	public static LoadRemoteWards(): RemoteWardDataset {
 		try {
 			const raw = WrapperUtils.readJSON<unknown>(REMOTE_DATASET_PATH)
 			return parseWardRecoDataset(raw)
@@ -217,7 +845,28 @@ export class WardDataLoader {
 				`[ward-helper] failed load remote wards: ${REMOTE_DATASET_PATH}`,
 				error
 			)
-			return []
+			return { wards: [], selections: [] }
+		}
+	}
+
+	/** Returns undefined when the package ships no sharded remote dataset. */
+	public static LoadRemoteShardManifest(): Nullable<RemoteShardEntry[]> {
+		try {
+			return parseShardManifest(
+				WrapperUtils.readJSON<unknown>(REMOTE_SHARD_MANIFEST_PATH)
+			)
+		} catch {
+			return undefined
+		}
+	}
+
+	public static LoadRemoteShard(entry: RemoteShardEntry): RemoteWardDataset {
+		const path = `${REMOTE_SHARD_DIR}/${entry.path}`
+		try {
+			return parseWardRecoDataset(WrapperUtils.readJSON<unknown>(path))
+		} catch (error) {
+			console.error(`[ward-helper] failed load remote ward shard: ${path}`, error)
+			return { wards: [], selections: [] }
 		}
 	}
 
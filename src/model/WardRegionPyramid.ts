@@ -0,0 +1,124 @@
+import { WardPoint, WardTeam, WardType } from "./WardTypes"
+
+/** One region of a pyramid level as stored by the builder. */
+export interface WardRegionNode {
+	/** Spots in the region, listed or not. */
+	count: number
+	/** Top spots of the region, best first. */
+	wards: WardPoint[]
+	/** Dataset row of each listed ward, the rank tie-break. */
+	spotIndices: number[]
+}
+
+interface WardRegionLevel {
+	/** Listed wards of every node, in the selector's rank order. */
+	wards: WardPoint[]
+	/** Node of each entry in wards. */
+	nodes: number[]
+	/** Entries listed per node. */
+	listed: number[]
+	/** Whether a node holds more spots than it lists. */
+	truncated: boolean[]
+}
+
+/**
+ * Builder-embedded region quota candidates at fixed region sizes. Each node
+ * keeps its best few spots, so a region quota pass only walks those instead
+ * of ranking every remote ward.
+ */
+export class WardRegionPyramid {
+	private readonly levels = new Map<string, WardRegionLevel>()
+
+	constructor(public readonly topK: number) {}
+
+	public SetLevel(
+		team: WardTeam,
+		timeBucket: string,
+		type: WardType,
+		regionSize: number,
+		nodes: WardRegionNode[]
+	) {
+		const entries: { ward: WardPoint; spotIndex: number; node: number }[] = []
+		const listed: number[] = []
+		const truncated: boolean[] = []
+		for (let i = 0; i < nodes.length; i++) {
+			const node = nodes[i]
+			for (let j = 0; j < node.wards.length; j++) {
+				entries.push({
+					ward: node.wards[j],
+					spotIndex: node.spotIndices[j],
+					node: i
+				})
+			}
+			listed.push(node.wards.length)
+			truncated.push(node.count > node.wards.length)
+		}
+		// Score, then dataset order: what the selector's stable sort produces.
+		entries.sort((a, b) => {
+			const as = a.ward.score ?? Number.NEGATIVE_INFINITY
+			const bs = b.ward.score ?? Number.NEGATIVE_INFINITY
+			return bs === as ? a.spotIndex - b.spotIndex : bs - as
+		})
+		this.levels.set(`${team}:${timeBucket}:${type}:${regionSize}`, {
+			wards: entries.map(entry => entry.ward),
+			nodes: entries.map(entry => entry.node),
+			listed,
+			truncated
+		})
+	}
+
+	/** Copies the other pyramid's levels in; false when the node sizes differ. */
+	public Merge(other: WardRegionPyramid): boolean {
+		if (other.topK !== this.topK) {
+			return false
+		}
+		for (const [levelKey, level] of other.levels) {
+			this.levels.set(levelKey, level)
+		}
+		return true
+	}
+
+	/**
+	 * Greedy region quota pass over the level's candidates. accept applies the
+	 * caller's other rules to a candidate given the picks so far. Undefined when
+	 * there is no such level or a truncated node runs out of candidates with its
+	 * quota open, since its unlisted spots could then change the result.
+	 */
+	public Select(
+		team: WardTeam,
+		timeBucket: string,
+		type: WardType,
+		regionSize: number,
+		regionQuota: number,
+		topN: number,
+		accept: (ward: WardPoint, selected: WardPoint[]) => boolean
+	): Nullable<WardPoint[]> {
+		const level = this.levels.get(`${team}:${timeBucket}:${type}:${regionSize}`)
+		if (level === undefined || regionQuota <= 0 || regionQuota > this.topK) {
+			return undefined
+		}
+		const remaining = level.listed.slice()
+		const taken = new Array<number>(remaining.length).fill(0)
+		const out: WardPoint[] = []
+		for (let i = 0; i < level.wards.length; i++) {
+			const ward = level.wards[i]
+			const node = level.nodes[i]
+			remaining[node] -= 1
+			if (taken[node] < regionQuota && accept(ward, out)) {
+				taken[node] += 1
+				out.push(ward)
+				if (out.length >= topN) {
+					return out
+				}
+			}
+			if (
+				remaining[node] === 0 &&
+				taken[node] < regionQuota &&
+				level.truncated[node]
+			) {
+				return undefined
+			}
+		}
+		return out
+	}
+}
@@ -0,0 +1,98 @@
+import { clamp } from "./Utils"
+import { WardPoint, WardTeam, WardType } from "./WardTypes"
+
+// Matches build_ward_reco_runtime.py WORLD_ORIGIN_OFFSET / WORLD_CELL_SIZE.
+const WORLD_ORIGIN_OFFSET = 16384
+const WORLD_CELL_SIZE = 128
+// One world unit of slack so float rounding can't drop hits on tile edges.
+const QUERY_SLACK = 1
+
+/**
+ * Builder-embedded uniform grid over minimap cell space. Radius queries only
+ * visit the tiles under the query circle instead of every ward.
+ */
+export class WardSpatialIndex {
+	private readonly groups = new Map<string, Map<number, WardPoint[]>>()
+
+	constructor(
+		public readonly tileCells: number,
+		public readonly gridSize: number
+	) {}
+
+	public SetTile(
+		team: WardTeam,
+		timeBucket: string,
+		type: WardType,
+		tileKey: number,
+		wards: WardPoint[]
+	) {
+		const groupKey = `${team}:${timeBucket}:${type}`
+		let tiles = this.groups.get(groupKey)
+		if (tiles === undefined) {
+			tiles = new Map<number, WardPoint[]>()
+			this.groups.set(groupKey, tiles)
+		}
+		tiles.set(tileKey, wards)
+	}
+
+	/** Copies the other index's tiles in; false when the grids differ. */
+	public Merge(other: WardSpatialIndex): boolean {
+		if (other.tileCells !== this.tileCells || other.gridSize !== this.gridSize) {
+			return false
+		}
+		for (const [groupKey, tiles] of other.groups) {
+			const target = this.groups.get(groupKey)
+			if (target === undefined) {
+				this.groups.set(groupKey, new Map(tiles))
+				continue
+			}
+			for (const [tileKey, wards] of tiles) {
+				target.set(tileKey, wards)
+			}
+		}
+		return true
+	}
+
+	public QueryRadius(
+		team: WardTeam,
+		timeBucket: string,
+		type: WardType,
+		x: number,
+		y: number,
+		radius: number
+	): WardPoint[] {
+		const out: WardPoint[] = []
+		const tiles = this.groups.get(`${team}:${timeBucket}:${type}`)
+		if (tiles === undefined || radius < 0) {
+			return out
+		}
+		const reach = radius + QUERY_SLACK
+		const minTX = this.tileCoord(x - reach)
+		const maxTX = this.tileCoord(x + reach)
+		const minTY = this.tileCoord(y - reach)
+		const maxTY = this.tileCoord(y + reach)
+		const radiusSq = radius * radius
+		for (let ty = minTY; ty <= maxTY; ty++) {
+			for (let tx = minTX; tx <= maxTX; tx++) {
+				const wards = tiles.get(ty * this.gridSize + tx)
+				if (wards === undefined) {
+					continue
+				}
+				for (let i = 0; i < wards.length; i++) {
+					const ward = wards[i]
+					const dx = ward.x - x
+					const dy = ward.y - y
+					if (dx * dx + dy * dy <= radiusSq) {
+						out.push(ward)
+					}
+				}
+			}
+		}
+		return out
+	}
+
+	private tileCoord(world: number): number {
+		const cell = (world + WORLD_ORIGIN_OFFSET) / WORLD_CELL_SIZE
+		return clamp(Math.floor(cell / this.tileCells), 0, this.gridSize - 1)
+	}
+}
@@ -20,17 +20,19 @@ import { InputEdgeTracker } from "../input"
 import { MenuManager } from "../menu"
 import { CustomWardStorage } from "./CustomWardStorage"
 import { PlaceHelper } from "./PlaceHelper"
+import { RemoteShardCache } from "./RemoteShardCache"
 import { RemoteWardEditor } from "./RemoteWardEditor"
 import { RemoteWardStorage } from "./RemoteWardStorage"
 import { TooltipAnimator } from "./TooltipAnimator"
 import { VisibleWardSelector } from "./VisibleWardSelector"
-import { WardDataLoader } from "./WardDataLoader"
+import { RemoteWardDataset, WardDataLoader } from "./WardDataLoader"
 import { WardListPresenter } from "./WardListPresenter"
 import { WardRenderer } from "./WardRenderer"
 import { WardState } from "./WardState"
 import {
 	DEFAULT_WARD_DESCRIPTION,
 	DEFAULT_WARD_TEAMS,
+	WARD_TEAM_VALUES,
 	WardPoint,
 	WardTeam,
 	WardTeams
@@ -54,9 +56,12 @@ interface PlacedWardPositions {
 export class WardSpawnerModel {
 	private isCustomLoading = false
 	private effectsAreReset = false
+	private isRemoteEdited = false
+	private remoteShardKey: Nullable<string>
 	private readonly state = new WardState()
 	private readonly storage = new CustomWardStorage()
 	private readonly remoteStorage = new RemoteWardStorage()
+	private readonly remoteShards = new RemoteShardCache()
 	private readonly placeHelper: PlaceHelper
 	private readonly tooltipAnimator = new TooltipAnimator()
 	private readonly input = new InputEdgeTracker()
@@ -107,21 +112,76 @@ export class WardSpawnerModel {
 
 	private ensureRemoteWardsLoaded() {
 		if (this.state.isRemoteLoaded) {
+			this.syncRemoteShard()
 			return
 		}
-		const baseRemote = WardDataLoader.LoadRemoteWards()
-		this.state.remoteWards = baseRemote
+		const baseRemote = this.remoteShards.Refresh()
+			? this.loadRemoteShardWards()
+			: WardDataLoader.LoadRemoteWards()
+		this.state.remoteWards = baseRemote.wards
+		this.state.remoteSelections = baseRemote.selections
+		this.state.remoteSpatialIndex = baseRemote.spatialIndex
+		this.state.remoteCounterSentry = baseRemote.counterSentry
+		this.state.remoteRegionPyramid = baseRemote.regionPyramid
 		this.state.isRemoteLoaded = true
-		this.menu.SetRemoteWardStats(`Loaded remote wards: ${baseRemote.length}`)
+		this.menu.SetRemoteWardStats(`Loaded remote wards: ${baseRemote.wards.length}`)
 		void this.remoteStorage.Load().then(edited => {
 			if (edited === undefined) {
 				return
 			}
+			this.isRemoteEdited = true
 			this.state.remoteWards = edited
+			this.state.remoteSelections = []
+			this.state.remoteSpatialIndex = undefined
+			this.state.remoteCounterSentry = undefined
+			this.state.remoteRegionPyramid = undefined
 			this.menu.SetRemoteWardStats(`Loaded remote wards: ${edited.length} (edited)`)
 		})
 	}
 
+	/** Swaps in the shard for the current team and time bucket once either changes. */
+	private syncRemoteShard() {
+		if (this.isRemoteEdited || !this.remoteShards.IsAvailable) {
+			return
+		}
+		if (this.getRemoteShardKey() === this.remoteShardKey) {
+			return
+		}
+		if (!this.remoteShards.Refresh()) {
+			return
+		}
+		const dataset = this.loadRemoteShardWards()
+		this.state.remoteWards = dataset.wards
+		this.state.remoteSelections = dataset.selections
+		this.state.remoteSpatialIndex = dataset.spatialIndex
+		this.state.remoteCounterSentry = dataset.counterSentry
+		this.state.remoteRegionPyramid = dataset.regionPyramid
+		this.menu.SetRemoteWardStats(
+			`Loaded remote wards: ${this.state.remoteWards.length}`
+		)
+	}
+
+	private loadRemoteShardWards(): RemoteWardDataset {
+		this.remoteShardKey = this.getRemoteShardKey()
+		// Saved edits replace the whole remote list, so edit mode needs every shard.
+		if (this.menu.EditRemoteMode.value) {
+			return this.remoteShards.Load(WARD_TEAM_VALUES, undefined)
+		}
+		const team = this.TeamToWardTeam(this.GetEffectiveLocalGameTeam())
+		return this.remoteShards.Load(
+			team !== undefined ? [team] : WARD_TEAM_VALUES,
+			this.GetCurrentTimeBucket()
+		)
+	}
+
+	private getRemoteShardKey(): string {
+		if (this.menu.EditRemoteMode.value) {
+			return "all"
+		}
+		const team = this.TeamToWardTeam(this.GetEffectiveLocalGameTeam()) ?? "any"
+		return `${team}:${this.GetCurrentTimeBucket()}`
+	}
+
 	private ensureCustomWardsLoaded() {
 		if (this.state.isCustomLoaded || this.isCustomLoading) {
 			return
@@ -249,11 +309,25 @@ export class WardSpawnerModel {
 		const placed = this.GetPlacedWardPositions(localGameTeam)
 		return this.visibleWardSelector.Select({
 			remoteWards: this.state.remoteWards,
+			// Edit mode moves wards in place, which invalidates the precomputed data.
+			remoteSelections: this.menu.EditRemoteMode.value
+				? []
+				: this.state.remoteSelections,
+			remoteSpatialIndex: this.menu.EditRemoteMode.value
+				? undefined
+				: this.state.remoteSpatialIndex,
+			remoteCounterSentry: this.menu.EditRemoteMode.value
+				? undefined
+				: this.state.remoteCounterSentry,
+			remoteRegionPyramid: this.menu.EditRemoteMode.value
+				? undefined
+				: this.state.remoteRegionPyramid,
 			customWards: this.state.customWards,
 			localTeam: this.TeamToWardTeam(localGameTeam),
 			currentBucket: this.GetCurrentTimeBucket(),
 			placedObserver: placed.observer,
 			placedSentry: placed.sentry,
+			enemyObserver: this.GetVisibleEnemyObserverPositions(localGameTeam),
 			showCustomWards: this.menu.ShowCustomWards.value,
 			teamFilterEnabled: this.menu.TeamFilter.value,
 			dynamicTopPerType: this.menu.DynamicTopPerType.value,
@@ -329,7 +403,37 @@ export class WardSpawnerModel {
 		return { observer, sentry }
 	}
 
+	private GetVisibleEnemyObserverPositions(localTeam: Team): Vector3[] {
+		const out: Vector3[] = []
+		if (
+			!this.menu.CounterEnemyObservers.value ||
+			(localTeam !== Team.Radiant && localTeam !== Team.Dire)
+		) {
+			return out
+		}
+		const wards = EntityManager.GetEntitiesByClass(WardObserver)
+		for (let i = 0; i < wards.length; i++) {
+			const ward = wards[i]
+			if (
+				!ward.IsValid ||
+				!ward.IsAlive ||
+				!ward.IsVisible ||
+				ward.Team === localTeam ||
+				ward instanceof WardTrueSight
+			) {
+				continue
+			}
+			out.push(new Vector3(ward.Position.x, ward.Position.y, ward.Position.z))
+		}
+		return out
+	}
+
 	private SaveRemoteWards() {
+		this.isRemoteEdited = true
+		this.state.remoteSelections = []
+		this.state.remoteSpatialIndex = undefined
+		this.state.remoteCounterSentry = undefined
+		this.state.remoteRegionPyramid = undefined
 		void this.remoteStorage.Save(this.state.remoteWards).catch(() => undefined)
 		this.menu.SetRemoteWardStats(
 			`Loaded remote wards: ${this.state.remoteWards.length} (edited)`
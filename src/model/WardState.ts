@@ -1,4 +1,7 @@
-import { WardPoint } from "./WardTypes"
+import { WardCounterSentryTable } from "./WardCounterSentryTable"
+import { WardRegionPyramid } from "./WardRegionPyramid"
+import { WardSpatialIndex } from "./WardSpatialIndex"
+import { RankedWardSelection, WardPoint } from "./WardTypes"
 
 export interface RemoteDragState {
 	/** Live ward inside remoteWards that is being dragged. */
@@ -11,6 +14,14 @@ export interface RemoteDragState {
 
 export class WardState {
 	public remoteWards: WardPoint[] = []
+	/** Precomputed rankings over remoteWards; cleared once remote wards are edited. */
+	public remoteSelections: RankedWardSelection[] = []
+	/** Grid over remoteWards; cleared together with remoteSelections. */
+	public remoteSpatialIndex?: WardSpatialIndex
+	/** Counter-sentry table over remoteWards; cleared together with remoteSelections. */
+	public remoteCounterSentry?: WardCounterSentryTable
+	/** Region quota pyramid over remoteWards; cleared together with remoteSelections. */
+	public remoteRegionPyramid?: WardRegionPyramid
 	public customWards: WardPoint[] = []
 	public hoveredWard?: WardPoint
 	public remoteDrag?: RemoteDragState
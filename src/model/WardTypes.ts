@@ -32,6 +32,21 @@ export interface WardPoint {
 	teams?: WardTeam[]
 }
 
+/** Builder-precomputed, already decluttered ranking for one selector preset. */
+export interface RankedWardSelection {
+	team: WardTeam
+	timeBucket: string
+	type: WardType
+	minCellDistance: number
+	minMinimapDistance: number
+	regionQuota: number
+	regionSize: number
+	/** Undefined for sentry lists, which the risky-observer filter doesn't touch. */
+	excludeRiskyObserver?: boolean
+	maxTopN: number
+	wards: WardPoint[]
+}
+
 export const DEFAULT_WARD_DESCRIPTION = "Custom ward desc"
 export const WARD_TEAM_VALUES: WardTeam[] = [WardTeams.Dire, WardTeams.Radiant]
 export const WARD_TEAM_OPTION_VALUES: WardTeamOption[] = [
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+
+"""
+ward_reco_json_schema.py
+
+A compiled JSON Schema validator for the ward recommendation runtime files,
+used by build_ward_reco_runtime.py's output validation stage.
+
+Only the draft 2020-12 keywords ward_reco_dataset.runtime.schema.json uses are
+supported; compiling a schema with any other keyword fails, so a schema edit
+that needs a new keyword is caught instead of silently under-checked.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from typing import Any, Callable
+
+SCHEMA_ANNOTATION_KEYWORDS = frozenset(("$schema", "$id", "$defs", "title", "description"))
+SCHEMA_SCALAR_KEYWORDS = frozenset(
+    ("type", "enum", "const", "minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum")
+)
+SCHEMA_KEYWORDS = SCHEMA_SCALAR_KEYWORDS | frozenset(
+    (
+        "required",
+        "properties",
+        "items",
+        "prefixItems",
+        "minItems",
+        "maxItems",
+        "oneOf",
+        "not",
+        "if",
+        "then",
+        "$ref"
+    )
+)
+
+
+class _SchemaMismatch(Exception):
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+        self.message = message
+        self.path: list[str] = []
+
+
+def _is_json_number(value: Any) -> bool:
+    return type(value) is int or (type(value) is float and math.isfinite(value))
+
+
+def _json_equal(value: Any, expected: Any) -> bool:
+    return value == expected and (type(value) is bool) == (type(expected) is bool)
+
+
+SCHEMA_TYPE_CHECKS: dict[str, Callable[[Any], bool]] = {
+    "object": lambda value: type(value) is dict,
+    "array": lambda value: type(value) is list,
+    "string": lambda value: type(value) is str,
+    "boolean": lambda value: type(value) is bool,
+    "null": lambda value: value is None,
+    "integer": lambda value: type(value) is int
+    or (type(value) is float and value.is_integer()),
+    # Unlike plain JSON Schema, NaN and infinities fail: JSON cannot hold them.
+    "number": _is_json_number
+}
+
+
+class CompiledJsonSchema:
+    """A JSON Schema compiled once into nested closures.
+
+    Covers the draft 2020-12 keywords the runtime schema uses and refuses any
+    other, so a schema edit can't be silently under-checked. Scalar subschemas
+    become one predicate, which array items run through map() without a call
+    per keyword; the error path is only built on failure.
+    """
+
+    def __init__(self, schema: dict[str, Any]) -> None:
+        self._root = schema
+        self._refs: dict[str, Callable[[Any], None] | None] = {}
+        self._check = self._compile(schema)
+
+    def error(self, value: Any) -> str | None:
+        """First mismatch as '$.path: message', or None when value conforms."""
+        try:
+            self._check(value)
+        except _SchemaMismatch as exc:
+            return "$" + "".join(reversed(exc.path)) + ": " + exc.message
+        return None
+
+    def _compile(self, schema: Any) -> Callable[[Any], None]:
+        if not isinstance(schema, dict):
+            raise RuntimeError(f"unsupported JSON schema node: {schema!r}")
+        unknown = set(schema) - SCHEMA_KEYWORDS - SCHEMA_ANNOTATION_KEYWORDS
+        if unknown:
+            raise RuntimeError(f"unsupported JSON schema keywords: {', '.join(sorted(unknown))}")
+        checks: list[Callable[[Any], None]] = []
+        predicate = self._compile_predicate(schema)
+        if predicate is not None:
+            checks.append(self._predicate_check(schema, predicate))
+        if "required" in schema or "properties" in schema:
+            checks.append(self._compile_object(schema))
+        if {"items", "prefixItems", "minItems", "maxItems"} & set(schema):
+            checks.append(self._compile_array(schema))
+        if "$ref" in schema:
+            checks.append(self._compile_ref(schema["$ref"]))
+        if "oneOf" in schema:
+            checks.append(self._compile_one_of(schema["oneOf"]))
+        if "not" in schema:
+            negated = self._compile(schema["not"])
+
+            def check_not(value: Any) -> None:
+                try:
+                    negated(value)
+                except _SchemaMismatch:
+                    return
+                raise _SchemaMismatch("matches a schema it must not")
+
+            checks.append(check_not)
+        if "if" in schema:
+            condition = self._compile(schema["if"])
+            then = self._compile(schema["then"]) if "then" in schema else None
+
+            def check_if(value: Any) -> None:
+                try:
+                    condition(value)
+                except _SchemaMismatch:
+                    return
+                if then is not None:
+                    then(value)
+
+            checks.append(check_if)
+        if not checks:
+            return lambda value: None
+        if len(checks) == 1:
+            return checks[0]
+
+        def check_all(value: Any) -> None:
+            for check in checks:
+                check(value)
+
+        return check_all
+
+    def _compile_predicate(self, schema: dict[str, Any]) -> Callable[[Any], bool] | None:
+        predicates: list[Callable[[Any], bool]] = []
+        if "type" in schema:
+            names = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+            type_checks = [SCHEMA_TYPE_CHECKS[name] for name in names]
+            predicates.append(
+                type_checks[0]
+                if len(type_checks) == 1
+                else lambda value: any(check(value) for check in type_checks)
+            )
+        if "enum" in schema:
+            options = list(schema["enum"])
+            predicates.append(lambda value: any(_json_equal(value, option) for option in options))
+        if "const" in schema:
+            expected = schema["const"]
+            predicates.append(lambda value: _json_equal(value, expected))
+        bounds: list[tuple[str, float]] = [
+            (name, float(schema[name]))
+            for name in ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum")
+            if name in schema
+        ]
+        for name, bound in bounds:
+            compare: Callable[[Any, float], bool] = {
+                "minimum": lambda value, limit: value >= limit,
+                "maximum": lambda value, limit: value <= limit,
+                "exclusiveMinimum": lambda value, limit: value > limit,
+                "exclusiveMaximum": lambda value, limit: value < limit
+            }[name]
+            predicates.append(
+                lambda value, compare=compare, bound=bound: not _is_json_number(value)
+                or compare(value, bound)
+            )
+        if not predicates:
+            return None
+        if len(predicates) == 1:
+            return predicates[0]
+        if len(predicates) == 2:
+            first, second = predicates
+            return lambda value: first(value) and second(value)
+        return lambda value: all(predicate(value) for predicate in predicates)
+
+    def _predicate_check(
+        self,
+        schema: dict[str, Any],
+        predicate: Callable[[Any], bool]
+    ) -> Callable[[Any], None]:
+        expected = {key: schema[key] for key in SCHEMA_SCALAR_KEYWORDS if key in schema}
+
+        def check(value: Any) -> None:
+            if not predicate(value):
+                raise _SchemaMismatch(
+                    f"expected {json.dumps(expected, sort_keys=True)}, got {value!r:.80}"
+                )
+
+        return check
+
+    def _compile_object(self, schema: dict[str, Any]) -> Callable[[Any], None]:
+        required = list(schema.get("required", ()))
+        properties = [
+            (key, self._compile(subschema))
+            for key, subschema in schema.get("properties", {}).items()
+        ]
+
+        def check(value: Any) -> None:
+            if type(value) is not dict:
+                return
+            for key in required:
+                if key not in value:
+                    raise _SchemaMismatch(f"missing required property {key!r}")
+            for key, check_property in properties:
+                if key in value:
+                    try:
+                        check_property(value[key])
+                    except _SchemaMismatch as exc:
+                        exc.path.append(f".{key}")
+                        raise
+
+        return check
+
+    def _compile_array(self, schema: dict[str, Any]) -> Callable[[Any], None]:
+        min_items = int(schema.get("minItems", 0))
+        max_items = schema.get("maxItems")
+        prefix = [self._compile(subschema) for subschema in schema.get("prefixItems", ())]
+        items = schema.get("items")
+        item_predicate = (
+            self._compile_predicate(items)
+            if isinstance(items, dict) and set(items) <= SCHEMA_SCALAR_KEYWORDS
+            else None
+        )
+        check_item = self._compile(items) if items is not None else None
+
+        def check(value: Any) -> None:
+            if type(value) is not list:
+                return
+            if len(value) < min_items:
+                raise _SchemaMismatch(f"expected at least {min_items} items, got {len(value)}")
+            if max_items is not None and len(value) > max_items:
+                raise _SchemaMismatch(f"expected at most {max_items} items, got {len(value)}")
+            position = 0
+            try:
+                for position, check_prefix in enumerate(prefix[:len(value)]):
+                    check_prefix(value[position])
+                if check_item is None:
+                    return
+                rest = value[len(prefix):] if prefix else value
+                if item_predicate is not None and all(map(item_predicate, rest)):
+                    return
+                for position, item in enumerate(rest, start=len(prefix)):
+                    check_item(item)
+            except _SchemaMismatch as exc:
+                exc.path.append(f"[{position}]")
+                raise
+
+        return check
+
+    def _compile_ref(self, ref: str) -> Callable[[Any], None]:
+        if ref not in self._refs:
+            if not ref.startswith("#/"):
+                raise RuntimeError(f"unsupported JSON schema $ref: {ref}")
+            target: Any = self._root
+            for part in ref[2:].split("/"):
+                target = target[part.replace("~1", "/").replace("~0", "~")]
+            # Placeholder first, so a self-referencing schema resolves lazily.
+            self._refs[ref] = None
+            self._refs[ref] = self._compile(target)
+        compiled = self._refs[ref]
+        if compiled is not None:
+            return compiled
+        return lambda value: self._refs[ref](value)  # type: ignore[misc]
+
+    def _compile_one_of(self, options: list[Any]) -> Callable[[Any], None]:
+        compiled = [self._compile(option) for option in options]
+
+        def check(value: Any) -> None:
+            matched = 0
+            errors: list[_SchemaMismatch] = []
+            for check_option in compiled:
+                try:
+                    check_option(value)
+                    matched += 1
+                except _SchemaMismatch as exc:
+                    errors.append(exc)
+            if matched == 1:
+                return
+            if matched == 0 and len(errors) == 1:
+                raise errors[0]
+            if matched == 0:
+                details = "; ".join(
+                    "$" + "".join(reversed(exc.path)) + ": " + exc.message for exc in errors
+                )
+                raise _SchemaMismatch(f"matches none of oneOf ({details})")
+            raise _SchemaMismatch(f"matches {matched} oneOf options, expected exactly 1")
+
+        return check